@@ -1,9 +1,11 @@
 from agents.base_agent import BaseAgent
 from langchain.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
 from prompts.brief_prompts import BRIEF_TASK_GENERATION_PROMPT
+from utils.helpers import parse_llm_json
 from typing import Dict, List, Any
-import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class BriefProcessingAgent(BaseAgent):
@@ -17,7 +19,6 @@ class BriefProcessingAgent(BaseAgent):
     def __init__(self):
         super().__init__(model="gpt-4o", temperature=0.7)
         self.prompt = ChatPromptTemplate.from_template(BRIEF_TASK_GENERATION_PROMPT)
-        self.output_parser = JsonOutputParser()
     
     async def execute(self, brief_name: str, description: str) -> Dict[str, Any]:
         """
@@ -53,16 +54,8 @@ class BriefProcessingAgent(BaseAgent):
             # Invoke LLM
             response = await self.llm.ainvoke(messages)
             
-            # Parse JSON response
-            content = response.content
-            
-            # Clean potential markdown code blocks
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            result = json.loads(content)
+            # Parse JSON response (markdown code blocks are ignored)
+            result = parse_llm_json(response.content)
             
             # Validate structure
             if "tasks" not in result:
@@ -76,7 +69,7 @@ class BriefProcessingAgent(BaseAgent):
             return result
             
         except Exception as e:
-            print(f"BriefProcessingAgent error: {e}")
+            logger.error("BriefProcessingAgent error: %s", e)
             # Return fallback structure
             return {
                 "tasks": [
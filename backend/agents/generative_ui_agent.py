@@ -6,8 +6,12 @@ from prompts.ui_generation_prompts import (
     DESIGNER_VIEW_GENERATION_PROMPT
 )
 from typing import List, Dict, Any
+import asyncio
+import logging
 import json
 
+logger = logging.getLogger(__name__)
+
 
 class GenerativeUIAgent(BaseAgent):
     """
@@ -56,6 +60,36 @@ class GenerativeUIAgent(BaseAgent):
         else:
             return {"components": [], "error": f"Unknown role: {role}"}
     
+    async def generate_views(
+        self,
+        brief: Dict,
+        tasks: List[Dict],
+        roles: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Generate several roles' views concurrently (one LLM call per role).
+        
+        Args:
+            brief: Brief dict
+            tasks: List of tasks
+            roles: Roles to generate (pm, dev, designer)
+            
+        Returns:
+            Dict of role -> view content (as from generate_view_content)
+        """
+        results = await asyncio.gather(
+            *(self.generate_view_content(brief, tasks, role) for role in roles),
+            return_exceptions=True
+        )
+        
+        views = {}
+        for role, result in zip(roles, results):
+            if isinstance(result, Exception):
+                logger.error("%s view generation error: %s", role, result)
+                result = {"components": [], "error": f"Failed to generate {role} view"}
+            views[role] = result
+        return views
+    
     async def _generate_pm_view(self, brief: Dict, tasks: List[Dict]) -> Dict[str, Any]:
         """Generate PM view: Kanban, Stories, Timeline"""
         try:
@@ -98,7 +132,7 @@ class GenerativeUIAgent(BaseAgent):
             }
             
         except Exception as e:
-            print(f"PM view generation error: {e}")
+            logger.error("PM view generation error: %s", e)
             return self._default_pm_view(brief, tasks)
     
     async def _generate_dev_view(self, brief: Dict, tasks: List[Dict]) -> Dict[str, Any]:
@@ -142,7 +176,7 @@ class GenerativeUIAgent(BaseAgent):
             }
             
         except Exception as e:
-            print(f"Dev view generation error: {e}")
+            logger.error("Dev view generation error: %s", e)
             return self._default_dev_view(brief, tasks)
     
     async def _generate_designer_view(self, brief: Dict, tasks: List[Dict]) -> Dict[str, Any]:
@@ -186,7 +220,7 @@ class GenerativeUIAgent(BaseAgent):
             }
             
         except Exception as e:
-            print(f"Designer view generation error: {e}")
+            logger.error("Designer view generation error: %s", e)
             return self._default_designer_view(brief, tasks)
     
     def _default_kanban(self, tasks: List[Dict]) -> Dict:
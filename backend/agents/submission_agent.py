@@ -2,8 +2,11 @@ from agents.base_agent import BaseAgent
 from langchain.prompts import ChatPromptTemplate
 from prompts.submission_prompts import SUBMISSION_ANALYSIS_PROMPT, ACTIVITY_GROUPING_PROMPT
 from typing import List, Dict, Any, Optional
+import logging
 import json
 
+logger = logging.getLogger(__name__)
+
 
 class SubmissionAnalysisAgent(BaseAgent):
     """
@@ -89,7 +92,7 @@ class SubmissionAnalysisAgent(BaseAgent):
             return result
             
         except Exception as e:
-            print(f"SubmissionAnalysisAgent error: {e}")
+            logger.error("SubmissionAnalysisAgent error: %s", e)
             # Fallback summary
             return {
                 "summary": self._generate_fallback_summary(activities, role),
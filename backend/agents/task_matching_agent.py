@@ -3,8 +3,11 @@ from langchain.prompts import ChatPromptTemplate
 from langchain_openai import OpenAIEmbeddings
 from prompts.task_matching_prompts import TASK_MATCHING_PROMPT
 from typing import List, Dict, Any, Optional
+import logging
 import json
 
+logger = logging.getLogger(__name__)
+
 
 class TaskMatchingAgent(BaseAgent):
     """
@@ -101,7 +104,7 @@ class TaskMatchingAgent(BaseAgent):
             return matched_ids
             
         except Exception as e:
-            print(f"TaskMatchingAgent error: {e}")
+            logger.error("TaskMatchingAgent error: %s", e)
             # Fallback: simple keyword matching
             return self._fallback_matching(tasks, summary, activities)
     
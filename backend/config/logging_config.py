@@ -0,0 +1,32 @@
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+def setup_logging(level: str = "INFO") -> QueueListener:
+    """
+    Route application logs through a queue so stdout writes happen on a
+    background thread instead of the event loop.
+    
+    Args:
+        level: Root log level name (e.g. "DEBUG", "INFO")
+        
+    Returns:
+        The started QueueListener; call stop() on shutdown to flush it
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(level.upper())
+    
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
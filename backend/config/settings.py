@@ -19,6 +19,9 @@ class Settings(BaseSettings):
     # Server Configuration
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # Largest incoming WebSocket message uvicorn will buffer (bytes)
+    WS_MAX_SIZE: int = 65536
+    LOG_LEVEL: str = "INFO"
     
     class Config:
         env_file = ".env"
@@ -1,12 +1,19 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
+import logging
 import uvicorn
 
 from routers import auth, briefs, submissions, users, chat, desktop, webhooks
 from services.agent_manager import get_agent_manager
+from services.websocket_manager import get_websocket_manager
+from services.clerk_auth import close_jwks_client
 from config.settings import settings
+from config.logging_config import setup_logging
+
+log_listener = setup_logging(settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -14,21 +21,28 @@ async def lifespan(app: FastAPI):
     """
     Lifespan context manager for startup and shutdown events.
     
-    Startup: Initialize agent manager (lazy-loaded agents)
-    Shutdown: Cleanup resources
+    Startup: Initialize agent manager (lazy-loaded agents), start WebSocket broadcaster
+    Shutdown: Stop the broadcaster, close shared HTTP clients, flush logs
     """
     # Startup
-    print("🚀 Starting DRIFT API Server...")
-    print(f"📝 Agent Model: {settings.AGENT_MODEL}")
+    logger.info("Starting DRIFT API Server...")
+    logger.info("Agent Model: %s", settings.AGENT_MODEL)
     
     # Initialize agent manager (singleton)
     agent_manager = get_agent_manager()
-    print("✅ Agent Manager initialized")
+    logger.info("Agent Manager initialized")
+    
+    # Start background WebSocket broadcaster
+    ws_manager = get_websocket_manager()
+    ws_manager.start()
     
     yield
     
     # Shutdown
-    print("👋 Shutting down DRIFT API Server...")
+    logger.info("Shutting down DRIFT API Server...")
+    await ws_manager.stop()
+    await close_jwks_client()
+    log_listener.stop()
 
 
 # Create FastAPI app
@@ -38,6 +52,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -110,7 +125,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     
     Returns standard error response format.
     """
-    print(f"Unhandled exception: {exc}")
+    logger.exception("Unhandled exception: %s", exc)
     
     return JSONResponse(
         status_code=500,
@@ -130,6 +145,11 @@ if __name__ == "__main__":
         "main:app",
         host=settings.HOST,
         port=settings.PORT,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        ws_max_size=settings.WS_MAX_SIZE,  # bound per-frame buffering on every socket
+        ws_per_message_deflate=True,  # compress WebSocket frames (JSON broadcasts shrink a lot)
         reload=True,  # Auto-reload on code changes (dev only)
         log_level="info"
     )
@@ -0,0 +1,10 @@
+-- ============================================
+-- DRIFT: Screenshots Storage Bucket
+-- Run this in Supabase SQL Editor
+-- ============================================
+
+-- 1. Private bucket for screen-analysis uploads
+-- Objects are read by OpenAI through 60s signed URLs and deleted after analysis
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('screenshots', 'screenshots', false)
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,32 @@
+-- ============================================
+-- DRIFT: Single-Round-Trip User Upsert
+-- Run this in Supabase SQL Editor
+-- ============================================
+
+-- 1. Insert or refresh a user from Clerk claims in one statement
+-- Existing org_id and role are never overwritten with NULL; role is left
+-- to the column default / onboarding. is_new is true when the row was inserted.
+-- schema.sql used to define upsert_user RETURNS users; the return type cannot
+-- be changed in place, so drop the old signature first.
+DROP FUNCTION IF EXISTS upsert_user(TEXT, TEXT, TEXT, TEXT, TEXT);
+
+CREATE OR REPLACE FUNCTION upsert_user(
+    p_id TEXT,
+    p_org_id TEXT,
+    p_email TEXT,
+    p_name TEXT,
+    p_avatar_url TEXT
+)
+RETURNS TABLE (role TEXT, org_id TEXT, is_new BOOLEAN)
+LANGUAGE sql
+AS $$
+    INSERT INTO users AS u (id, org_id, email, name, avatar_url)
+    VALUES (p_id, p_org_id, p_email, p_name, p_avatar_url)
+    ON CONFLICT (id) DO UPDATE SET
+        email = EXCLUDED.email,
+        name = EXCLUDED.name,
+        avatar_url = EXCLUDED.avatar_url,
+        org_id = COALESCE(EXCLUDED.org_id, u.org_id),
+        updated_at = NOW()
+    RETURNING u.role, u.org_id, (u.xmax = 0) AS is_new;
+$$;
@@ -0,0 +1,54 @@
+-- ============================================
+-- DRIFT: Atomic Submission + Activities Insert
+-- Run this in Supabase SQL Editor
+-- ============================================
+
+-- 1. Activities table (written by POST /submissions)
+CREATE TABLE IF NOT EXISTS submission_activities (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    submission_id UUID NOT NULL REFERENCES submissions(id) ON DELETE CASCADE,
+    app TEXT NOT NULL,
+    title TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    duration INTEGER NOT NULL DEFAULT 0,
+    "timestamp" BIGINT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS submission_activities_submission_idx ON submission_activities(submission_id);
+
+-- Enable RLS (allow all for now, backend handles auth)
+ALTER TABLE submission_activities ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow all submission_activities" ON submission_activities;
+CREATE POLICY "Allow all submission_activities" ON submission_activities
+    FOR ALL USING (true) WITH CHECK (true);
+
+-- 2. Insert a submission and its activities in one transaction
+-- sub: submissions columns as a JSON object; acts: array of activity objects.
+-- Returns the inserted submission row as JSON.
+CREATE OR REPLACE FUNCTION create_submission_with_activities(sub JSONB, acts JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_submission submissions;
+BEGIN
+    INSERT INTO submissions (
+        brief_id, user_id, user_name, role, summary_lines,
+        duration_minutes, matched_tasks, status
+    )
+    SELECT
+        s.brief_id, s.user_id, s.user_name, s.role, s.summary_lines,
+        s.duration_minutes, s.matched_tasks, s.status
+    FROM jsonb_populate_record(NULL::submissions, sub) AS s
+    RETURNING * INTO new_submission;
+
+    INSERT INTO submission_activities (submission_id, app, title, summary, duration, "timestamp")
+    SELECT new_submission.id, a.app, a.title, a.summary, a.duration, a."timestamp"
+    FROM jsonb_to_recordset(COALESCE(acts, '[]'::JSONB))
+        AS a(app TEXT, title TEXT, summary TEXT, duration INTEGER, "timestamp" BIGINT);
+
+    RETURN to_jsonb(new_submission);
+END;
+$$;
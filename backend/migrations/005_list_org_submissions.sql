@@ -0,0 +1,34 @@
+-- ============================================
+-- DRIFT: Org-Scoped Submission Listing
+-- Run this in Supabase SQL Editor
+-- ============================================
+
+-- 1. Indexes for the briefs join and newest-first paging
+CREATE INDEX IF NOT EXISTS submissions_brief_created_idx ON submissions(brief_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS briefs_org_id_idx ON briefs(org_id);
+
+-- 2. Submissions visible to an org (NULL org = briefs without an org),
+-- newest first. NULL filter arguments are ignored.
+CREATE OR REPLACE FUNCTION list_org_submissions(
+    p_org TEXT,
+    p_status TEXT,
+    p_brief UUID,
+    p_user TEXT,
+    p_limit INTEGER,
+    p_offset INTEGER
+)
+RETURNS SETOF submissions
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT s.*
+    FROM submissions s
+    JOIN briefs b ON b.id = s.brief_id
+    WHERE (b.org_id = p_org OR (p_org IS NULL AND b.org_id IS NULL))
+      AND (p_status IS NULL OR s.status = p_status)
+      AND (p_brief IS NULL OR s.brief_id = p_brief)
+      AND (p_user IS NULL OR s.user_id = p_user)
+    ORDER BY s.created_at DESC
+    LIMIT p_limit
+    OFFSET p_offset;
+$$;
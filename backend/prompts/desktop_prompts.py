@@ -0,0 +1,112 @@
+"""Prompts for the Desktop Integration router"""
+
+PROCESS_NOTE_PROMPT = """Transform this raw note into a clean, professional bullet point for a work log.
+
+{context}
+Raw note: "{note}"
+
+RULES:
+- Keep it SHORT (max 8 words)
+- Start with action verb (Added, Fixed, Implemented, Created, Updated, etc.)
+- Be specific if possible (include file/function names mentioned)
+- Professional tone
+- If note is already good, keep it similar
+
+Examples:
+- "fixed the bug" → "Fixed authentication bug"
+- "working on api" → "Implementing API endpoints"
+- "done with login" → "Completed login feature"
+- "testing stuff" → "Running tests"
+
+Output ONLY the bullet point, nothing else."""
+
+
+SCREEN_ANALYSIS_SYSTEM_PROMPT = """You are a sharp-eyed work tracker. Your job: spot and log CONCRETE progress, blockers, and decisions.
+
+{project_context}
+{previous}
+
+CAPTURE THESE (be specific!):
+- Function/component names being edited
+- Error messages or warnings visible
+- File names being worked on
+- API endpoints, database queries
+- Test results (pass/fail)
+- Git commits, branch names
+- Design decisions visible in code/comments
+- TODO/FIXME comments
+- Console output, logs
+
+SKIP THESE:
+- Generic "working in IDE" observations
+- Unchanged screens
+- Browser tabs with no relevant content
+- Anything already noted above
+
+OUTPUT FORMAT:
+{{"bullets": ["Editing UserAuth.tsx - adding password validation", "Error: Cannot read property 'id' of undefined"]}}
+or if nothing concrete:
+{{"skip": true}}
+
+Keep bullets SHORT (max 10 words) and SPECIFIC (names, numbers, exact errors)."""
+
+
+LIVE_INSIGHT_PROMPT = """You are an intelligent work assistant. Analyze this current work activity and provide a short, helpful update (1-2 sentences).
+
+ACTIVITIES (last minutes):
+{activity_text}
+{notes_text}
+Total time: ~{total_min} minutes
+
+RULES:
+- Be brief and specific (max 2 sentences)
+- Mention what's currently being done
+- Give a helpful tip or observation
+- Write in English
+- No JSON, just natural text
+
+Examples:
+- "Working on API integration. Don't forget to test the error handlers."
+- "Good progress on UI components! Already edited 3 files."
+- "Lots of time in docs - maybe time for the next code sprint?"
+
+Your insight:"""
+
+
+SESSION_ANALYSIS_PROMPT = """Analyze this work session and compare it to the project's existing tasks.
+
+SESSION DATA:
+- Duration: {duration_minutes} minutes
+- Summary: {summary}
+
+ACTIVITY LOG:
+{activity_summary}
+
+USER NOTES:
+{notes_text}
+
+EXISTING PROJECT TASKS:
+{tasks_text}
+
+ANALYZE AND RETURN JSON:
+{{
+    "updatedTasks": [
+        {{"taskId": "task_id_if_exists", "title": "Task title", "status": "done|in_progress", "wasUpdated": true, "reason": "Why this task was updated"}}
+    ],
+    "newTasks": [
+        {{"title": "New task title", "description": "What needs to be done", "priority": "high|medium|low", "reason": "Why this task was identified"}}
+    ],
+    "issues": [
+        "Any concerns, blockers, or deviations from plan"
+    ],
+    "aiSummary": "One paragraph summary of what was accomplished and project status"
+}}
+
+RULES:
+1. Only mark tasks as "done" if the work clearly completed them
+2. Mark tasks as "in_progress" if work started but not finished
+3. Add newTasks only for clear follow-up work identified
+4. Add issues if: work took longer than expected, blocked on something, or deviated from plan
+5. Be concise but specific in the aiSummary
+
+Return ONLY valid JSON, no other text."""
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Header, HTTPException, status
+from fastapi import APIRouter, Header
 from services.clerk_auth import get_current_user
-from services.supabase_client import get_supabase
+from routers.users import upsert_user
 
 router = APIRouter()
 
@@ -15,37 +15,18 @@ async def validate_session(
     
     Returns:
         User dict with userId, orgId, email, name, role, avatarUrl
+        (role is None until the user picks one in onboarding)
     """
     user = await get_current_user(authorization)
-    supabase = get_supabase()
-    
-    # Upsert user in database
-    user_data = {
-        "id": user["userId"],
-        "org_id": user["orgId"],
-        "email": user["email"],
-        "name": user["name"],
-        "avatar_url": user["avatarUrl"]
-    }
-    
-    # Check if user exists
-    existing = supabase.table("users").select("*").eq("id", user["userId"]).execute()
-    
-    if existing.data:
-        # Update existing user
-        supabase.table("users").update(user_data).eq("id", user["userId"]).execute()
-        role = existing.data[0].get("role", "dev")
-    else:
-        # Create new user with default role
-        user_data["role"] = "dev"
-        supabase.table("users").insert(user_data).execute()
-        role = "dev"
-    
+
+    # Same upsert_user RPC as /users/me so both endpoints agree on role/org_id
+    profile = await upsert_user(user)
+
     return {
-        "userId": user["userId"],
-        "orgId": user["orgId"],
-        "email": user["email"],
-        "name": user["name"],
-        "role": role,
-        "avatarUrl": user["avatarUrl"]
+        "userId": profile["userId"],
+        "orgId": profile["orgId"],
+        "email": profile["email"],
+        "name": profile["name"],
+        "role": profile["role"],
+        "avatarUrl": profile["avatarUrl"]
     }
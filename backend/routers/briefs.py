@@ -1,10 +1,14 @@
+import asyncio
+import logging
 from fastapi import APIRouter, Depends, HTTPException, Header, status, Query
 from typing import Optional, Dict, Any
 from models.schemas import BriefCreate
 from services.clerk_auth import get_current_user, verify_clerk_token
-from services.supabase_client import get_supabase
+from services.supabase_client import get_supabase, execute_query
 from services.agent_manager import get_agent_manager, AgentManager
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -77,7 +81,7 @@ async def create_brief(
     org_id = brief_data.orgId or user.get("orgId")
     
     if not org_id:
-        user_record = supabase.table("users").select("org_id").eq("id", user["userId"]).execute()
+        user_record = await execute_query(supabase.table("users").select("org_id").eq("id", user["userId"]))
         if user_record.data and user_record.data[0].get("org_id"):
             org_id = user_record.data[0]["org_id"]
         else:
@@ -93,7 +97,7 @@ async def create_brief(
         "created_by": user["userId"]
     }
     
-    brief_response = supabase.table("briefs").insert(brief_insert).execute()
+    brief_response = await execute_query(supabase.table("briefs").insert(brief_insert))
     
     if not brief_response.data:
         raise HTTPException(
@@ -123,14 +127,14 @@ async def create_brief(
             })
         
         if tasks_to_insert:
-            supabase.table("tasks").insert(tasks_to_insert).execute()
+            await execute_query(supabase.table("tasks").insert(tasks_to_insert))
         
     except Exception as e:
-        print(f"Task generation error: {e}")
+        logger.error("Task generation error: %s", e)
         # Brief created successfully even if task generation fails
     
     # Fetch brief with tasks
-    brief_with_tasks = supabase.table("briefs").select("*, tasks(*)").eq("id", brief["id"]).single().execute()
+    brief_with_tasks = await execute_query(supabase.table("briefs").select("*, tasks(*)").eq("id", brief["id"]).single())
     
     return _map_brief(brief_with_tasks.data, include_tasks=True)
 
@@ -145,7 +149,7 @@ async def get_brief(
     supabase = get_supabase()
     
     # Get brief with tasks
-    response = supabase.table("briefs").select("*, tasks(*)").eq("id", brief_id).eq("org_id", user["orgId"]).single().execute()
+    response = await execute_query(supabase.table("briefs").select("*, tasks(*)").eq("id", brief_id).eq("org_id", user["orgId"]).single())
     
     if not response.data:
         raise HTTPException(
@@ -165,14 +169,14 @@ async def list_briefs(
     supabase = get_supabase()
 
     # Get org_id from users table (set by webhook)
-    user_record = supabase.table("users").select("org_id").eq("id", user["userId"]).execute()
+    user_record = await execute_query(supabase.table("users").select("org_id").eq("id", user["userId"]))
     org_id = user_record.data[0].get("org_id") if user_record.data else None
     
     if not org_id:
         # Fallback: show user's own briefs
-        response = supabase.table("briefs").select("*").eq("created_by", user["userId"]).order("created_at", desc=True).execute()
+        response = await execute_query(supabase.table("briefs").select("*").eq("created_by", user["userId"]).order("created_at", desc=True))
     else:
-        response = supabase.table("briefs").select("*").eq("org_id", org_id).order("created_at", desc=True).execute()
+        response = await execute_query(supabase.table("briefs").select("*").eq("org_id", org_id).order("created_at", desc=True))
     
     briefs = response.data or []
     return {"briefs": [_map_brief(brief, include_tasks=False) for brief in briefs]}
@@ -187,7 +191,7 @@ async def delete_brief(
     user = await get_current_user(authorization)
     supabase = get_supabase()
 
-    response = supabase.table("briefs").delete().eq("id", brief_id).eq("org_id", user["orgId"]).execute()
+    response = await execute_query(supabase.table("briefs").delete().eq("id", brief_id).eq("org_id", user["orgId"]))
 
     if not response.data:
         raise HTTPException(
@@ -210,7 +214,7 @@ async def get_tasks(
     supabase = get_supabase()
     
     # Verify brief access
-    brief = supabase.table("briefs").select("id").eq("id", brief_id).eq("org_id", user["orgId"]).single().execute()
+    brief = await execute_query(supabase.table("briefs").select("id").eq("id", brief_id).eq("org_id", user["orgId"]).single())
     
     if not brief.data:
         raise HTTPException(
@@ -226,7 +230,7 @@ async def get_tasks(
     if status_filter:
         query = query.eq("status", status_filter)
     
-    response = query.execute()
+    response = await execute_query(query)
     
     tasks = response.data or []
 
@@ -252,7 +256,7 @@ async def get_brief_view(
     supabase = get_supabase()
     
     # Get brief and tasks
-    brief_response = supabase.table("briefs").select("*").eq("id", brief_id).eq("org_id", user["orgId"]).single().execute()
+    brief_response = await execute_query(supabase.table("briefs").select("*").eq("id", brief_id).eq("org_id", user["orgId"]).single())
     
     if not brief_response.data:
         raise HTTPException(
@@ -263,7 +267,7 @@ async def get_brief_view(
     brief = brief_response.data
     
     # Get tasks
-    tasks_response = supabase.table("tasks").select("*").eq("brief_id", brief_id).execute()
+    tasks_response = await execute_query(supabase.table("tasks").select("*").eq("brief_id", brief_id))
     tasks = tasks_response.data or []
     
     # Generate view with UI Agent
@@ -271,7 +275,6 @@ async def get_brief_view(
         ui_agent = agent_manager.get_agent("ui")
         
         # Add timeout to prevent hanging
-        import asyncio
         view_content = await asyncio.wait_for(
             ui_agent.generate_view_content(
                 brief=brief,
@@ -284,19 +287,72 @@ async def get_brief_view(
         return view_content
         
     except asyncio.TimeoutError:
-        print(f"View generation timeout for role: {role}")
+        logger.warning("View generation timeout for role: %s", role)
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
             detail={"code": "TIMEOUT", "message": "Generation took too long. Please try again."}
         )
     except Exception as e:
-        print(f"View generation error: {e}")
+        logger.error("View generation error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"code": "INTERNAL_ERROR", "message": f"Failed to generate view: {str(e)}"}
         )
 
 
+@router.get("/briefs/{brief_id}/views")
+async def get_brief_views(
+    brief_id: str,
+    roles: str = Query("pm,dev,designer", regex="^(pm|dev|designer)(,(pm|dev|designer))*$"),
+    authorization: str = Header(...),
+    agent_manager: AgentManager = Depends(get_agent_manager)
+):
+    """
+    Generate view content for several roles at once.
+    
+    The per-role LLM calls run concurrently, so this takes about as long as
+    the slowest role rather than the sum of all of them.
+    
+    Query: roles=pm,dev,designer (comma-separated, default all three)
+    """
+    user = await get_current_user(authorization)
+    supabase = get_supabase()
+    
+    # Get brief and tasks (tasks discarded below if the brief isn't visible)
+    brief_response, tasks_response = await asyncio.gather(
+        execute_query(supabase.table("briefs").select("*").eq("id", brief_id).eq("org_id", user["orgId"]).single()),
+        execute_query(supabase.table("tasks").select("*").eq("brief_id", brief_id))
+    )
+    
+    if not brief_response.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "NOT_FOUND", "message": "Brief not found"}
+        )
+    
+    brief = brief_response.data
+    tasks = tasks_response.data or []
+    
+    ui_agent = agent_manager.get_agent("ui")
+    try:
+        views = await asyncio.wait_for(
+            ui_agent.generate_views(
+                brief=brief,
+                tasks=tasks,
+                roles=list(dict.fromkeys(roles.split(",")))
+            ),
+            timeout=45  # 45 seconds total timeout
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Views generation timeout for roles: %s", roles)
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail={"code": "TIMEOUT", "message": "Generation took too long. Please try again."}
+        )
+    
+    return {"views": views}
+
+
 @router.get("/briefs/{brief_id}/submissions")
 async def get_submissions_for_brief(
     brief_id: str,
@@ -311,7 +367,7 @@ async def get_submissions_for_brief(
     supabase = get_supabase()
     
     # Verify brief access
-    brief = supabase.table("briefs").select("id").eq("id", brief_id).eq("org_id", user["orgId"]).single().execute()
+    brief = await execute_query(supabase.table("briefs").select("id").eq("id", brief_id).eq("org_id", user["orgId"]).single())
     
     if not brief.data:
         raise HTTPException(
@@ -329,7 +385,7 @@ async def get_submissions_for_brief(
     
     query = query.limit(limit).offset(offset).order("created_at", desc=True)
     
-    response = query.execute()
+    response = await execute_query(query)
     
     submissions = response.data or []
 
@@ -375,7 +431,7 @@ async def stream_brief_generation(websocket: WebSocket):
                 continue
             
             # Authenticate
-            token = data.get("token", "").replace("Bearer ", "")
+            token = data.get("token", "").removeprefix("Bearer ")
             try:
                 user = await verify_clerk_token(token)
             except Exception:
@@ -461,7 +517,7 @@ Generate 5-8 focused tasks appropriate for a {role}. Return ONLY valid JSON, no
     except WebSocketDisconnect:
         pass
     except Exception as e:
-        print(f"Streaming generation error: {e}")
+        logger.error("Streaming generation error: %s", e)
         try:
             await websocket.send_json({"type": "error", "message": str(e)})
         except:
@@ -3,6 +3,7 @@ AI Chat/Copilot Router - Real-time AI assistance for the workspace.
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Header
 from typing import Dict, Any, Optional
+import logging
 import json
 import asyncio
 
@@ -13,6 +14,8 @@ from langchain.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, SystemMessage
 from config.settings import settings
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 # AI Copilot System Prompt
@@ -130,7 +133,7 @@ async def websocket_chat(websocket: WebSocket):
             # Authenticate on first message or when token provided
             if "token" in data:
                 try:
-                    token = data["token"].replace("Bearer ", "")
+                    token = data["token"].removeprefix("Bearer ")
                     user_info = await verify_clerk_token(token)
                     user_id = user_info["userId"]
                 except Exception as e:
@@ -199,7 +202,7 @@ async def websocket_chat(websocket: WebSocket):
     except WebSocketDisconnect:
         pass
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        logger.error("WebSocket error: %s", e)
 
 
 @router.post("/chat")
@@ -217,7 +220,7 @@ async def chat_message(
     }
     """
     # Authenticate
-    token = authorization.replace("Bearer ", "")
+    token = authorization.removeprefix("Bearer ")
     user_info = await verify_clerk_token(token)
     user_id = user_info["userId"]
     
@@ -241,7 +244,7 @@ async def chat_message(
 @router.post("/chat/clear")
 async def clear_chat(authorization: str = Header(...)):
     """Clear conversation history."""
-    token = authorization.replace("Bearer ", "")
+    token = authorization.removeprefix("Bearer ")
     user_info = await verify_clerk_token(token)
     user_id = user_info["userId"]
     
@@ -265,7 +268,7 @@ async def generate_tasks(
         "role": "pm" | "dev" | "designer"
     }
     """
-    token = authorization.replace("Bearer ", "")
+    token = authorization.removeprefix("Bearer ")
     await verify_clerk_token(token)
     
     name = request.get("name", "")
@@ -334,7 +337,7 @@ async def generate_spec(
         "role": "pm" | "dev" | "designer"
     }
     """
-    token = authorization.replace("Bearer ", "")
+    token = authorization.removeprefix("Bearer ")
     await verify_clerk_token(token)
     
     name = request.get("name", "")
@@ -436,7 +439,7 @@ async def planning_stream(websocket: WebSocket):
                 continue
             
             # Authenticate
-            token = data.get("token", "").replace("Bearer ", "")
+            token = data.get("token", "").removeprefix("Bearer ")
             try:
                 await verify_clerk_token(token)
             except Exception:
@@ -509,7 +512,7 @@ Generate 4-6 focused, specific tasks appropriate for a {role_labels[role]}. Retu
     except WebSocketDisconnect:
         pass
     except Exception as e:
-        print(f"Planning WebSocket error: {e}")
+        logger.error("Planning WebSocket error: %s", e)
         try:
             await websocket.send_json({"type": "error", "message": str(e)})
         except:
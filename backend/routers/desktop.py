@@ -1,24 +1,109 @@
 """
 Desktop App Integration Router - Handles desktop overlay communication.
 """
-from fastapi import APIRouter, HTTPException, Header, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator, Awaitable, Callable, Union
+from typing_extensions import TypedDict
+from datetime import datetime, timezone
+from contextlib import nullcontext
+from functools import partial
+from collections import Counter
+from heapq import nlargest
+from operator import itemgetter
+import logging
+import asyncio
+import base64
+import hashlib
 import json
+import ciso8601
+import orjson
+import uuid
 
-from services.clerk_auth import verify_clerk_token
-from services.supabase_client import get_supabase
+from services.clerk_auth import cached_verify_clerk_token
+from services.supabase_client import get_supabase, execute_query, run_blocking
 from services.websocket_manager import websocket_manager
+from cachetools import TTLCache
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 from config.settings import settings
+from prompts.desktop_prompts import (
+    PROCESS_NOTE_PROMPT,
+    SCREEN_ANALYSIS_SYSTEM_PROMPT,
+    LIVE_INSIGHT_PROMPT,
+    SESSION_ANALYSIS_PROMPT
+)
+from utils.helpers import parse_llm_json, truncate_text
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Prompt size limits for session analysis / live insights
+MAX_ACTIVITY_LINES = 10
+MAX_FILES_PER_APP = 5
+MAX_NOTES = 20
+MAX_INSIGHT_ACTIVITY_CHARS = 2000
+
+# Pending tasks returned by /desktop/sync
+MAX_SYNC_TASKS = 10
+
+# brief_id -> {id, name, org_id, created_by}, used for start_session access checks
+_brief_cache: TTLCache = TTLCache(maxsize=50_000, ttl=30)
+
+# user_id -> users.role; roles change only during onboarding
+_role_cache: TTLCache = TTLCache(maxsize=50_000, ttl=60)
+
+# Per-route caps on in-flight OpenAI calls, sized to keep bursts under the
+# OpenAI rate limit. Vision calls take 3-8s and arrive in bursts from every
+# open overlay; session analysis is slower but rarer.
+_VISION_SEM = asyncio.Semaphore(8)
+_SESSION_ANALYSIS_SEM = asyncio.Semaphore(16)
+
+# blake2b(user_id + screenshot) -> analysis task for recently analysed
+# screens; an identical screenshot inside the window gets the same result
+_seen_screenshots: TTLCache = TTLCache(maxsize=1024, ttl=120)
+
+# Raw screenshots are handed to OpenAI as short-lived signed storage URLs,
+# signed only once a vision slot is held so queueing can't expire them
+SCREENSHOT_BUCKET = "screenshots"
+SCREENSHOT_URL_TTL = 60  # seconds
 
-class ActivityEntry(BaseModel):
-    """A single activity entry from the desktop app."""
+# Shared LLM clients; each keeps its own pooled HTTP connections to OpenAI
+_LLM_NOTE = ChatOpenAI(
+    model="gpt-4o-mini",  # Fast model for quick processing
+    temperature=0.3,
+    max_tokens=50,
+    api_key=settings.OPENAI_API_KEY
+)
+_LLM_VISION = ChatOpenAI(
+    model="gpt-4o",
+    temperature=0.3,
+    max_tokens=200,
+    api_key=settings.OPENAI_API_KEY
+)
+_LLM_INSIGHT = ChatOpenAI(
+    model="gpt-4o-mini",  # Faster model for live insights
+    temperature=0.7,
+    max_tokens=100,
+    api_key=settings.OPENAI_API_KEY
+)
+_LLM_ANALYZE = ChatOpenAI(
+    model="gpt-4o",
+    temperature=0.3,
+    api_key=settings.OPENAI_API_KEY
+)
+
+
+class ActivityEntry(TypedDict):
+    """
+    A single activity entry from the desktop app.
+
+    A TypedDict rather than a model: end-session payloads carry hundreds of
+    these, and validating into plain dicts skips a model instance per entry.
+    """
     app: str
     title: str
     duration: int  # seconds
@@ -79,6 +164,155 @@ class ProcessNoteRequest(BaseModel):
     recentActivity: Optional[str] = None  # Context about what user is doing
 
 
+def _rollup_activities(activities: List[Dict[str, Any]]) -> List[Tuple[str, int, List[str]]]:
+    """
+    Sum activity durations per app in a single pass.
+
+    Returns (app, total_seconds, files) tuples, longest first, with at most
+    MAX_FILES_PER_APP distinct files per app.
+    """
+    totals: Dict[str, int] = {}
+    files_by_app: Dict[str, Dict[str, None]] = {}
+    for act in activities:
+        app = act.get("app", "Unknown")
+        totals[app] = totals.get(app, 0) + act.get("totalDuration", 0)
+        files = act.get("files")
+        if files:
+            app_files = files_by_app.setdefault(app, {})
+            for file in files:
+                if len(app_files) >= MAX_FILES_PER_APP:
+                    break
+                app_files[file] = None
+
+    return [
+        (app, seconds, list(files_by_app.get(app, ())))
+        for app, seconds in sorted(totals.items(), key=lambda x: x[1], reverse=True)
+    ]
+
+
+def _join_items(items: List[str]) -> str:
+    """Join a (pre-sliced) list of strings for inline prompt context."""
+    return ", ".join(items)
+
+
+def _screenshot_digest(user_id: str, screenshot: bytes) -> bytes:
+    """Key a screenshot by its content and the user who sent it."""
+    return hashlib.blake2b(screenshot, digest_size=16, key=user_id.encode()[:64]).digest()
+
+
+def _forget_failed_analysis(digest: bytes, task: "asyncio.Future[Dict[str, Any]]"):
+    """Drop a cached analysis that was cancelled or failed, so a retry re-runs it."""
+    if task.cancelled() or task.exception() is not None or "error" in task.result():
+        if _seen_screenshots.get(digest) is task:
+            del _seen_screenshots[digest]
+
+
+async def _analyze_screenshot_once(
+    digest: bytes,
+    analyze: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Return the analysis for a screenshot digest, running analyze() only for
+    the first request in the cache window.
+
+    The analysis runs as a shared task: concurrent duplicates await it and
+    later duplicates get its result. Failed analyses are not cached.
+    """
+    task = _seen_screenshots.get(digest)
+    if task is None:
+        task = asyncio.ensure_future(analyze())
+        _seen_screenshots[digest] = task
+        task.add_done_callback(partial(_forget_failed_analysis, digest))
+    return await asyncio.shield(task)
+
+
+def _upload_screenshot(image: bytes) -> str:
+    """Store a JPEG in the screenshots bucket; returns its path."""
+    path = f"{uuid.uuid4().hex}.jpg"
+    get_supabase().storage.from_(SCREENSHOT_BUCKET).upload(path, image, {"content-type": "image/jpeg"})
+    return path
+
+
+def _sign_screenshot(path: str) -> str:
+    """Return a signed URL for a stored screenshot, valid for SCREENSHOT_URL_TTL."""
+    signed = get_supabase().storage.from_(SCREENSHOT_BUCKET).create_signed_url(path, SCREENSHOT_URL_TTL)
+    return signed["signedURL"]
+
+
+def _remove_screenshot(path: str):
+    """Delete an analysed screenshot from storage."""
+    try:
+        get_supabase().storage.from_(SCREENSHOT_BUCKET).remove([path])
+    except Exception as e:
+        logger.error("Screenshot cleanup error: %s", e)
+
+
+def _human_prompt(prompt: str) -> List[HumanMessage]:
+    """
+    Wrap a trusted, already-formatted prompt as a single-message list.
+    Uses construct() to skip pydantic validation of the message.
+    """
+    return [HumanMessage.construct(content=prompt)]
+
+
+async def _get_user_role(user_id: str) -> str:
+    """Return the user's role (default "dev"), cached for a minute."""
+    role = _role_cache.get(user_id)
+    if role is None:
+        user_result = await execute_query(
+            get_supabase().table("users")
+            .select("role")
+            .eq("id", user_id)
+            .single()
+        )
+        role = user_result.data.get("role", "dev") if user_result.data else "dev"
+        _role_cache[user_id] = role
+    return role
+
+
+async def _get_brief(brief_id: str) -> Optional[Dict[str, Any]]:
+    """Return id, name, org_id and created_by for a brief, cached briefly."""
+    brief = _brief_cache.get(brief_id)
+    if brief is None:
+        brief_result = await execute_query(
+            get_supabase().table("briefs")
+            .select("id, name, org_id, created_by")
+            .eq("id", brief_id)
+            .single()
+        )
+        if not brief_result.data:
+            return None
+        brief = brief_result.data
+        _brief_cache[brief_id] = brief
+    return brief
+
+
+async def _stream_llm(
+    llm: ChatOpenAI,
+    messages: Union[List[Any], Callable[[], Awaitable[List[Any]]]],
+    semaphore: Optional[asyncio.Semaphore] = None
+) -> AsyncIterator[str]:
+    """
+    Relay LLM output as server-sent events.
+
+    Each chunk is sent as a JSON-encoded string so newlines survive the
+    SSE framing; the stream ends with a literal [DONE] event. If a
+    semaphore is given it is held for the whole stream. messages may be a
+    coroutine function, built only once the semaphore is held.
+    """
+    try:
+        async with semaphore or nullcontext():
+            if callable(messages):
+                messages = await messages()
+            async for chunk in llm.astream(messages):
+                if chunk.content:
+                    yield f"data: {json.dumps(chunk.content)}\n\n"
+    except Exception as e:
+        logger.error("LLM stream error: %s", e)
+        yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+    yield "data: [DONE]\n\n"
+
+
 @router.post("/desktop/session/process-note")
 async def process_note(
     request: ProcessNoteRequest,
@@ -88,8 +322,8 @@ async def process_note(
     Process a raw user note into a clean, professional bullet point.
     Transforms informal notes like "fixed the bug" into "Fixed authentication bug in login flow"
     """
-    token = authorization.replace("Bearer ", "")
-    await verify_clerk_token(token)
+    token = authorization.removeprefix("Bearer ")
+    await cached_verify_clerk_token(token)
     
     if not request.note or len(request.note.strip()) < 2:
         return {"bullet": request.note, "processed": False}
@@ -101,34 +335,9 @@ async def process_note(
         context += f"Recent activity: {request.recentActivity}. "
     
     try:
-        llm = ChatOpenAI(
-            model="gpt-4o-mini",  # Fast model for quick processing
-            temperature=0.3,
-            max_tokens=50,
-            api_key=settings.OPENAI_API_KEY
-        )
-        
-        prompt = f"""Transform this raw note into a clean, professional bullet point for a work log.
-
-{context}
-Raw note: "{request.note}"
-
-RULES:
-- Keep it SHORT (max 8 words)
-- Start with action verb (Added, Fixed, Implemented, Created, Updated, etc.)
-- Be specific if possible (include file/function names mentioned)
-- Professional tone
-- If note is already good, keep it similar
-
-Examples:
-- "fixed the bug" → "Fixed authentication bug"
-- "working on api" → "Implementing API endpoints"
-- "done with login" → "Completed login feature"
-- "testing stuff" → "Running tests"
-
-Output ONLY the bullet point, nothing else."""
+        prompt = PROCESS_NOTE_PROMPT.format(context=context, note=request.note)
 
-        response = await llm.ainvoke([HumanMessage(content=prompt)])
+        response = await _LLM_NOTE.ainvoke(_human_prompt(prompt))
         bullet = response.content.strip().strip('"').strip("'").strip("-").strip("•").strip()
         
         # Ensure it starts with capital letter
@@ -138,7 +347,7 @@ Output ONLY the bullet point, nothing else."""
         return {"bullet": bullet, "processed": True, "original": request.note}
         
     except Exception as e:
-        print(f"Note processing error: {e}")
+        logger.error("Note processing error: %s", e)
         # Fallback: return original note
         return {"bullet": request.note, "processed": False, "error": str(e)}
 
@@ -152,77 +361,87 @@ async def sync_desktop_state(
     Sync desktop app state with server.
     Returns active briefs and pending tasks for the user.
     """
-    token = authorization.replace("Bearer ", "")
-    user_info = await verify_clerk_token(token)
+    token = authorization.removeprefix("Bearer ")
+    user_info = await cached_verify_clerk_token(token)
     user_id = user_info["userId"]
     org_id = user_info.get("orgId")
     
-    print(f"[desktop/sync] user_id: {user_id}, org_id: {org_id}")
+    logger.debug("[desktop/sync] user_id: %s, org_id: %s", user_id, org_id)
     
     supabase = get_supabase()
     
+    # Org briefs and the user's role are independent - fetch them together
+    briefs_query = None
+    if org_id:
+        briefs_query = execute_query(
+            supabase.table("briefs")
+            .select("id, name, description, status, org_id, created_by")
+            .eq("org_id", org_id)
+        )
+    role_query = _get_user_role(user_id)
+    
     # Try multiple strategies to find briefs
     briefs = []
     
     # Strategy 1: Get all briefs for org
-    if org_id:
-        briefs_result = supabase.table("briefs")\
-            .select("id, name, description, status, org_id, created_by")\
-            .eq("org_id", org_id)\
-            .execute()
+    if briefs_query is not None:
+        briefs_result, user_role = await asyncio.gather(briefs_query, role_query)
         briefs = briefs_result.data if briefs_result.data else []
-        print(f"[desktop/sync] Found {len(briefs)} briefs by org_id")
+        logger.debug("[desktop/sync] Found %s briefs by org_id", len(briefs))
+    else:
+        user_role = await role_query
     
     # Strategy 2: Get user's created briefs
     if not briefs:
-        briefs_result = supabase.table("briefs")\
-            .select("id, name, description, status, org_id, created_by")\
-            .eq("created_by", user_id)\
-            .execute()
+        briefs_result = await execute_query(
+            supabase.table("briefs")
+            .select("id, name, description, status, org_id, created_by")
+            .eq("created_by", user_id)
+        )
         briefs = briefs_result.data if briefs_result.data else []
-        print(f"[desktop/sync] Found {len(briefs)} briefs by created_by")
+        logger.debug("[desktop/sync] Found %s briefs by created_by", len(briefs))
     
     # Strategy 3: Get ALL briefs (for debugging - remove in production)
     if not briefs:
-        all_briefs_result = supabase.table("briefs")\
-            .select("id, name, description, status, org_id, created_by")\
-            .limit(10)\
-            .execute()
+        all_briefs_result = await execute_query(
+            supabase.table("briefs")
+            .select("id, name, description, status, org_id, created_by")
+            .limit(10)
+        )
         all_briefs = all_briefs_result.data if all_briefs_result.data else []
-        print(f"[desktop/sync] Total briefs in DB: {len(all_briefs)}")
+        logger.debug("[desktop/sync] Total briefs in DB: %s", len(all_briefs))
         if all_briefs:
-            print(f"[desktop/sync] Sample brief: org_id={all_briefs[0].get('org_id')}, created_by={all_briefs[0].get('created_by')}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[desktop/sync] Sample brief: org_id=%s, created_by=%s", all_briefs[0].get('org_id'), all_briefs[0].get('created_by'))
         
         # Use all briefs for now (temporary fix)
         briefs = all_briefs
     
-    # Get tasks assigned to user's role
-    user_result = supabase.table("users")\
-        .select("role")\
-        .eq("id", user_id)\
-        .single()\
-        .execute()
-    
-    user_role = user_result.data.get("role", "dev") if user_result.data else "dev"
-    
-    # Get pending tasks
+    # Get pending tasks for all briefs in one query, newest first
     tasks = []
-    for brief in briefs:
-        tasks_result = supabase.table("tasks")\
-            .select("id, title, description, status")\
-            .eq("brief_id", brief["id"])\
-            .eq("role", user_role)\
-            .neq("status", "done")\
-            .execute()
+    if briefs:
+        name_by_id = {b["id"]: b["name"] for b in briefs}
+        tasks_result = await execute_query(
+            supabase.table("tasks")
+            .select("id, title, description, status, brief_id")
+            .in_("brief_id", list(name_by_id))
+            .eq("role", user_role)
+            .neq("status", "done")
+            .order("created_at", desc=True)
+            .limit(MAX_SYNC_TASKS)
+        )
         
-        if tasks_result.data:
-            tasks.extend([{
-                "briefId": brief["id"],
-                "briefName": brief["name"],
-                **task
-            } for task in tasks_result.data])
+        tasks = [{
+            "briefId": task["brief_id"],
+            "briefName": name_by_id[task["brief_id"]],
+            "id": task["id"],
+            "title": task["title"],
+            "description": task["description"],
+            "status": task["status"]
+        } for task in tasks_result.data or []]
     
-    return {
+    # Plain dicts straight to orjson - skips jsonable_encoder on the hot path
+    return ORJSONResponse({
         "userId": user_id,
         "orgId": org_id,
         "role": user_role,
@@ -232,8 +451,8 @@ async def sync_desktop_state(
             "description": b.get("description", ""),
             "status": b["status"]
         } for b in briefs],
-        "pendingTasks": tasks[:10]  # Limit to 10 most relevant tasks
-    }
+        "pendingTasks": tasks
+    })
 
 
 @router.post("/desktop/session/start")
@@ -245,25 +464,18 @@ async def start_session(
     Start a work session for a brief.
     Returns session ID for tracking.
     """
-    token = authorization.replace("Bearer ", "")
-    user_info = await verify_clerk_token(token)
+    token = authorization.removeprefix("Bearer ")
+    user_info = await cached_verify_clerk_token(token)
     user_id = user_info["userId"]
     org_id = user_info.get("orgId")
     
     supabase = get_supabase()
     
-    # Verify brief exists and user has access
-    brief_result = supabase.table("briefs")\
-        .select("id, name, org_id, created_by")\
-        .eq("id", request.briefId)\
-        .single()\
-        .execute()
-    
-    if not brief_result.data:
+    # Verify brief exists and user has access (cached for warm briefs)
+    brief = await _get_brief(request.briefId)
+    if brief is None:
         raise HTTPException(status_code=404, detail="Brief not found")
     
-    brief = brief_result.data
-    
     # Check access: user must be creator OR in same org
     has_access = False
     if brief.get("created_by") == user_id:
@@ -275,7 +487,7 @@ async def start_session(
         has_access = brief.get("created_by") == user_id
     
     if not has_access:
-        print(f"[Session] Access denied: user={user_id}, org={org_id}, brief_org={brief.get('org_id')}, brief_creator={brief.get('created_by')}")
+        logger.warning("[Session] Access denied: user=%s, org=%s, brief_org=%s, brief_creator=%s", user_id, org_id, brief.get('org_id'), brief.get('created_by'))
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Create session in DB
@@ -287,9 +499,10 @@ async def start_session(
         "status": "active"
     }
     
-    result = supabase.table("work_sessions")\
-        .insert(session_data)\
-        .execute()
+    result = await execute_query(
+        supabase.table("work_sessions")
+        .insert(session_data)
+    )
     
     if not result.data:
         raise HTTPException(status_code=500, detail="Failed to create session")
@@ -299,24 +512,21 @@ async def start_session(
     started_at = session.get("started_at") or session.get("created_at")
     
     # Notify web clients
-    try:
-        await websocket_manager.broadcast_event(
-            "session:started",
-            {
-                "sessionId": session_id,
-                "userId": user_id,
-                "briefId": request.briefId,
-                "briefName": brief_result.data["name"]
-            },
-            org_id
-        )
-    except Exception as e:
-        print(f"WebSocket broadcast error: {e}")
+    websocket_manager.publish(
+        "session:started",
+        {
+            "sessionId": session_id,
+            "userId": user_id,
+            "briefId": request.briefId,
+            "briefName": brief["name"]
+        },
+        org_id
+    )
     
     return {
         "sessionId": session_id,
         "briefId": request.briefId,
-        "briefName": brief_result.data["name"],
+        "briefName": brief["name"],
         "startedAt": started_at
     }
 
@@ -330,19 +540,20 @@ async def end_session(
     End a work session and optionally submit work.
     Processes activities and creates submission.
     """
-    token = authorization.replace("Bearer ", "")
-    user_info = await verify_clerk_token(token)
+    token = authorization.removeprefix("Bearer ")
+    user_info = await cached_verify_clerk_token(token)
     user_id = user_info["userId"]
     
     supabase = get_supabase()
     
     # Get session from DB
-    session_result = supabase.table("work_sessions")\
-        .select("*")\
-        .eq("id", request.sessionId)\
-        .eq("status", "active")\
-        .single()\
-        .execute()
+    session_result = await execute_query(
+        supabase.table("work_sessions")
+        .select("*")
+        .eq("id", request.sessionId)
+        .eq("status", "active")
+        .single()
+    )
     
     if not session_result.data:
         raise HTTPException(status_code=404, detail="Session not found or already ended")
@@ -353,46 +564,44 @@ async def end_session(
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Calculate duration
-    started_at_str = session.get("started_at") or session.get("created_at")
-    if "Z" in started_at_str:
-        started_at = datetime.fromisoformat(started_at_str.replace("Z", "+00:00"))
-    elif "+" in started_at_str:
-        started_at = datetime.fromisoformat(started_at_str)
-    else:
-        started_at = datetime.fromisoformat(started_at_str)
-    
-    ended_at = datetime.utcnow()
-    duration_minutes = max(1, int((ended_at - started_at.replace(tzinfo=None)).total_seconds() / 60))
-    
-    # Update session in DB
-    supabase.table("work_sessions")\
-        .update({
-            "ended_at": ended_at.isoformat(),
-            "duration_minutes": duration_minutes,
-            "status": "completed"
-        })\
-        .eq("id", request.sessionId)\
-        .execute()
-    
-    # Get user name
-    user_result = supabase.table("users")\
-        .select("name, email")\
-        .eq("id", user_id)\
-        .single()\
-        .execute()
+    started_at = ciso8601.parse_datetime(session.get("started_at") or session.get("created_at"))
+    if started_at.tzinfo is None:
+        # timestamptz columns always carry an offset; treat anything else as UTC
+        started_at = started_at.replace(tzinfo=timezone.utc)
+    
+    ended_at = datetime.now(timezone.utc)
+    duration_minutes = max(1, int((ended_at - started_at).total_seconds() / 60))
+    
+    # Update session in DB and get user name - independent, so run together
+    _, user_result = await asyncio.gather(
+        execute_query(
+            supabase.table("work_sessions")
+            .update({
+                "ended_at": ended_at.isoformat(),
+                "duration_minutes": duration_minutes,
+                "status": "completed"
+            })
+            .eq("id", request.sessionId)
+        ),
+        execute_query(
+            supabase.table("users")
+            .select("name, email")
+            .eq("id", user_id)
+            .single()
+        )
+    )
     
     user_name = user_result.data.get("name") or user_result.data.get("email", "User") if user_result.data else "User"
     
     # Generate summary from activities
     summary_lines = []
     if request.activities:
-        app_durations: Dict[str, int] = {}
+        app_durations: Counter = Counter()
         for activity in request.activities:
-            app_durations[activity.app] = app_durations.get(activity.app, 0) + activity.duration
+            app_durations[activity["app"]] += activity["duration"]
         
         # Top 3 apps
-        sorted_apps = sorted(app_durations.items(), key=lambda x: x[1], reverse=True)[:3]
-        for app, duration in sorted_apps:
+        for app, duration in nlargest(3, app_durations.items(), key=itemgetter(1)):
             mins = duration // 60
             if mins > 0:
                 summary_lines.append(f"Worked in {app} for {mins} minutes")
@@ -415,28 +624,26 @@ async def end_session(
         "status": "pending"
     }
     
-    submission_result = supabase.table("submissions")\
-        .insert(submission_data)\
-        .execute()
+    submission_result = await execute_query(
+        supabase.table("submissions")
+        .insert(submission_data)
+    )
     
     submission_id = submission_result.data[0]["id"] if submission_result.data else None
     
     # Notify web clients
-    try:
-        await websocket_manager.broadcast_event(
-            "session:ended",
-            {
-                "sessionId": request.sessionId,
-                "submissionId": submission_id,
-                "userId": user_id,
-                "userName": user_name,
-                "briefId": session["brief_id"],
-                "durationMinutes": duration_minutes
-            },
-            session.get("org_id")
-        )
-    except:
-        pass  # WebSocket notification is optional
+    websocket_manager.publish(
+        "session:ended",
+        {
+            "sessionId": request.sessionId,
+            "submissionId": submission_id,
+            "userId": user_id,
+            "userName": user_name,
+            "briefId": session["brief_id"],
+            "durationMinutes": duration_minutes
+        },
+        session.get("org_id")
+    )
     
     return {
         "sessionId": request.sessionId,
@@ -446,75 +653,46 @@ async def end_session(
     }
 
 
-@router.post("/desktop/session/analyze-screen")
-async def analyze_screen(
-    request: ScreenAnalysisRequest,
-    authorization: str = Header(...)
+async def _analyze_screenshot(
+    image_url: Union[str, Callable[[], Awaitable[str]]],
+    project_name: Optional[str],
+    project_description: Optional[str],
+    current_tasks: Optional[List[str]],
+    previous_insights: Optional[List[str]],
+    stream: bool
 ):
     """
-    Analyze a screenshot using Vision AI and extract important points.
-    This runs continuously during a session to capture what's happening.
-    """
-    token = authorization.replace("Bearer ", "")
-    await verify_clerk_token(token)
-    
-    if not request.screenshot:
-        return {"bullets": [], "skip": True}
+    Run the vision prompt on a screenshot (shared by the JSON and raw endpoints).
     
+    image_url is the URL itself, or a coroutine function returning it; the
+    latter is awaited only once a vision slot is held, so a signed URL
+    can't expire while the request queues on _VISION_SEM.
+    """
     # Build context about the project
     project_context = ""
-    if request.projectName:
-        project_context += f"Project: {request.projectName}\n"
-    if request.projectDescription:
-        project_context += f"Description: {request.projectDescription}\n"
-    if request.currentTasks:
-        project_context += f"Current tasks: {', '.join(request.currentTasks[:5])}\n"
+    if project_name:
+        project_context += f"Project: {project_name}\n"
+    if project_description:
+        project_context += f"Description: {project_description}\n"
+    if current_tasks:
+        project_context += f"Current tasks: {_join_items(current_tasks[:5])}\n"
     
     # Previous insights to avoid repetition
     previous = ""
-    if request.previousInsights:
-        previous = f"\nAlready noted (DO NOT repeat): {', '.join(request.previousInsights[-5:])}"
+    if previous_insights:
+        previous = f"\nAlready noted (DO NOT repeat): {_join_items(previous_insights[-5:])}"
     
-    try:
-        llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0.3,
-            max_tokens=200,
-            api_key=settings.OPENAI_API_KEY
-        )
+    async def build_messages() -> List[Dict[str, Any]]:
+        url = image_url if isinstance(image_url, str) else await image_url()
         
         # Vision prompt - optimized for capturing actionable work insights
-        messages = [
+        return [
             {
                 "role": "system",
-                "content": f"""You are a sharp-eyed work tracker. Your job: spot and log CONCRETE progress, blockers, and decisions.
-
-{project_context}
-{previous}
-
-CAPTURE THESE (be specific!):
-- Function/component names being edited
-- Error messages or warnings visible
-- File names being worked on
-- API endpoints, database queries
-- Test results (pass/fail)
-- Git commits, branch names
-- Design decisions visible in code/comments
-- TODO/FIXME comments
-- Console output, logs
-
-SKIP THESE:
-- Generic "working in IDE" observations
-- Unchanged screens
-- Browser tabs with no relevant content
-- Anything already noted above
-
-OUTPUT FORMAT:
-{{"bullets": ["Editing UserAuth.tsx - adding password validation", "Error: Cannot read property 'id' of undefined"]}}
-or if nothing concrete:
-{{"skip": true}}
-
-Keep bullets SHORT (max 10 words) and SPECIFIC (names, numbers, exact errors)."""
+                "content": SCREEN_ANALYSIS_SYSTEM_PROMPT.format(
+                    project_context=project_context,
+                    previous=previous
+                )
             },
             {
                 "role": "user",
@@ -526,15 +704,23 @@ Keep bullets SHORT (max 10 words) and SPECIFIC (names, numbers, exact errors).""
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{request.screenshot}",
+                            "url": url,
                             "detail": "low"  # Use low detail for speed
                         }
                     }
                 ]
             }
         ]
+    
+    try:
+        if stream:
+            return StreamingResponse(
+                _stream_llm(_LLM_VISION, build_messages, _VISION_SEM),
+                media_type="text/event-stream"
+            )
         
-        response = await llm.ainvoke(messages)
+        async with _VISION_SEM:
+            response = await _LLM_VISION.ainvoke(await build_messages())
         content = response.content.strip()
         
         # Parse response
@@ -543,12 +729,7 @@ Keep bullets SHORT (max 10 words) and SPECIFIC (names, numbers, exact errors).""
         
         # Try to parse JSON
         try:
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            result = json.loads(content)
+            result = parse_llm_json(content)
             bullets = result.get("bullets", [])
             
             # Filter out empty or too short bullets
@@ -564,80 +745,174 @@ Keep bullets SHORT (max 10 words) and SPECIFIC (names, numbers, exact errors).""
             return {"bullets": [], "skip": True}
         
     except Exception as e:
-        print(f"Screen analysis error: {e}")
+        logger.error("Screen analysis error: %s", e)
         return {"bullets": [], "skip": True, "error": str(e)}
 
 
+@router.post("/desktop/session/analyze-screen")
+async def analyze_screen(
+    request: ScreenAnalysisRequest,
+    authorization: str = Header(...),
+    stream: bool = Query(False)
+):
+    """
+    Analyze a screenshot using Vision AI and extract important points.
+    This runs continuously during a session to capture what's happening.
+
+    Pass ?stream=1 to receive the raw model output as server-sent events
+    instead of the parsed JSON body.
+    """
+    token = authorization.removeprefix("Bearer ")
+    user_info = await cached_verify_clerk_token(token)
+    
+    if not request.screenshot:
+        return {"bullets": [], "skip": True}
+    
+    def analyze():
+        return _analyze_screenshot(
+            f"data:image/jpeg;base64,{request.screenshot}",
+            request.projectName,
+            request.projectDescription,
+            request.currentTasks,
+            request.previousInsights,
+            stream
+        )
+    
+    if stream:
+        return await analyze()
+    
+    digest = _screenshot_digest(user_info["userId"], request.screenshot.encode())
+    return await _analyze_screenshot_once(digest, analyze)
+
+
+@router.post("/desktop/session/analyze-screen-raw")
+async def analyze_screen_raw(
+    http_request: Request,
+    authorization: str = Header(...),
+    projectName: Optional[str] = Query(None),
+    projectDescription: Optional[str] = Query(None),
+    currentTasks: Optional[List[str]] = Query(None),
+    previousInsights: Optional[List[str]] = Query(None),
+    stream: bool = Query(False)
+):
+    """
+    Same as analyze-screen, but the body is the raw JPEG (Content-Type:
+    image/jpeg) and project metadata comes in query params.
+    
+    The image is uploaded to storage and OpenAI gets a signed URL, so it
+    is never base64-encoded. If the upload or signing fails it falls back
+    to a data URL.
+    """
+    token = authorization.removeprefix("Bearer ")
+    user_info = await cached_verify_clerk_token(token)
+    
+    body = await http_request.body()
+    if not body:
+        return {"bullets": [], "skip": True}
+    
+    path: Optional[str] = None
+    
+    async def analyze():
+        nonlocal path
+        try:
+            path = await run_blocking(_upload_screenshot, body)
+        except Exception as e:
+            logger.error("Screenshot upload error: %s", e)
+        
+        async def image_url() -> str:
+            # Signed once a vision slot is held (see _analyze_screenshot)
+            if path:
+                try:
+                    return await run_blocking(_sign_screenshot, path)
+                except Exception as e:
+                    logger.error("Screenshot signing error: %s", e)
+            return "data:image/jpeg;base64," + base64.b64encode(body).decode()
+        
+        return await _analyze_screenshot(
+            image_url,
+            projectName,
+            projectDescription,
+            currentTasks,
+            previousInsights,
+            stream
+        )
+    
+    if stream:
+        result = await analyze()
+    else:
+        # Duplicates reuse the first request's result and never upload
+        result = await _analyze_screenshot_once(_screenshot_digest(user_info["userId"], body), analyze)
+    
+    if path:
+        # Delete after the response is sent; streamed, the model may still be fetching it
+        cleanup = BackgroundTask(_remove_screenshot, path)
+        if isinstance(result, Response):
+            result.background = cleanup
+        else:
+            result = ORJSONResponse(result, background=cleanup)
+    
+    return result
+
+
 @router.post("/desktop/session/live-insight")
 async def get_live_insight(
     request: LiveInsightRequest,
-    authorization: str = Header(...)
+    authorization: str = Header(...),
+    stream: bool = Query(False)
 ):
     """
     Generate a live AI insight about current work session.
     This is called periodically during a session to provide real-time feedback.
+
+    Pass ?stream=1 to receive the insight as server-sent events so the
+    overlay can render the first tokens while the rest is generated.
     """
-    token = authorization.replace("Bearer ", "")
-    await verify_clerk_token(token)
+    token = authorization.removeprefix("Bearer ")
+    await cached_verify_clerk_token(token)
     
     if not request.activities:
-        return {"insight": None}
+        return ORJSONResponse({"insight": None})
     
     # Build activity context
-    activity_text = ""
+    activity_lines = []
     for act in request.activities[-5:]:  # Last 5 activities
         app = act.get("app", "Unknown")
         file = act.get("file", "")
         duration = act.get("duration", 0)
         if file:
-            activity_text += f"- {app}: {file} ({duration}s)\n"
+            activity_lines.append(f"- {app}: {file} ({duration}s)\n")
         else:
-            activity_text += f"- {app} ({duration}s)\n"
+            activity_lines.append(f"- {app} ({duration}s)\n")
+    activity_text = truncate_text("".join(activity_lines), MAX_INSIGHT_ACTIVITY_CHARS)
     
     notes_text = ""
     if request.notes:
-        notes_text = "User notes: " + ", ".join(request.notes[-3:])
+        notes_text = "User notes: " + _join_items(request.notes[-3:])
     
     total_min = (request.totalDuration or 0) // 60
     
     # Quick AI insight prompt
-    prompt = f"""You are an intelligent work assistant. Analyze this current work activity and provide a short, helpful update (1-2 sentences).
-
-ACTIVITIES (last minutes):
-{activity_text}
-{notes_text}
-Total time: ~{total_min} minutes
-
-RULES:
-- Be brief and specific (max 2 sentences)
-- Mention what's currently being done
-- Give a helpful tip or observation
-- Write in English
-- No JSON, just natural text
-
-Examples:
-- "Working on API integration. Don't forget to test the error handlers."
-- "Good progress on UI components! Already edited 3 files."
-- "Lots of time in docs - maybe time for the next code sprint?"
-
-Your insight:"""
+    prompt = LIVE_INSIGHT_PROMPT.format(
+        activity_text=activity_text,
+        notes_text=notes_text,
+        total_min=total_min
+    )
 
     try:
-        llm = ChatOpenAI(
-            model="gpt-4o-mini",  # Faster model for live insights
-            temperature=0.7,
-            max_tokens=100,
-            api_key=settings.OPENAI_API_KEY
-        )
+        if stream:
+            return StreamingResponse(
+                _stream_llm(_LLM_INSIGHT, _human_prompt(prompt)),
+                media_type="text/event-stream"
+            )
         
-        response = await llm.ainvoke([HumanMessage(content=prompt)])
+        response = await _LLM_INSIGHT.ainvoke(_human_prompt(prompt))
         insight = response.content.strip()
         
-        return {"insight": insight}
+        return ORJSONResponse({"insight": insight})
         
     except Exception as e:
-        print(f"Live insight error: {e}")
-        return {"insight": None, "error": str(e)}
+        logger.error("Live insight error: %s", e)
+        return ORJSONResponse({"insight": None, "error": str(e)})
 
 
 @router.post("/desktop/session/analyze")
@@ -655,8 +930,8 @@ async def analyze_session(
     - issues: Any deviations from plan or concerns
     - aiSummary: AI-generated summary of the session
     """
-    token = authorization.replace("Bearer ", "")
-    user_info = await verify_clerk_token(token)
+    token = authorization.removeprefix("Bearer ")
+    user_info = await cached_verify_clerk_token(token)
     user_id = user_info["userId"]
     org_id = user_info.get("orgId")
     
@@ -666,161 +941,146 @@ async def analyze_session(
     brief_id = request.briefId
     if not brief_id and request.sessionId:
         # Try to get brief from session
-        session_result = supabase.table("work_sessions")\
-            .select("brief_id")\
-            .eq("id", request.sessionId)\
-            .single()\
-            .execute()
+        session_result = await execute_query(
+            supabase.table("work_sessions")
+            .select("brief_id")
+            .eq("id", request.sessionId)
+            .single()
+        )
         if session_result.data:
             brief_id = session_result.data.get("brief_id")
     
     existing_tasks = []
     if brief_id:
-        tasks_result = supabase.table("tasks")\
-            .select("id, title, description, status, priority, role")\
-            .eq("brief_id", brief_id)\
-            .execute()
+        tasks_result = await execute_query(
+            supabase.table("tasks")
+            .select("id, title, description, status, priority, role")
+            .eq("brief_id", brief_id)
+        )
         existing_tasks = tasks_result.data or []
     
     # Build context for AI analysis
-    activity_summary = ""
+    activity_lines = []
     if request.activities:
-        for act in request.activities:
-            app = act.get("app", "Unknown")
-            duration = act.get("totalDuration", 0) // 60
-            files = act.get("files", [])
+        # Rollup is sorted longest first, so the cap keeps the most relevant apps
+        for app, seconds, files in _rollup_activities(request.activities)[:MAX_ACTIVITY_LINES]:
+            duration = seconds // 60
             if duration > 0:
-                activity_summary += f"- {app}: {duration}m"
                 if files:
-                    activity_summary += f" (files: {', '.join(files[:3])})"
-                activity_summary += "\n"
+                    activity_lines.append(f"- {app}: {duration}m (files: {', '.join(files)})\n")
+                else:
+                    activity_lines.append(f"- {app}: {duration}m\n")
+    activity_summary = "".join(activity_lines)
     
     notes_text = ""
     if request.notes:
-        notes_text = "\n".join([f"- {n.get('text', '')}" for n in request.notes])
+        notes_text = "\n".join([f"- {n.get('text', '')}" for n in request.notes[-MAX_NOTES:]])
     
-    tasks_text = ""
-    for task in existing_tasks:
-        tasks_text += f"- [{task['status'].upper()}] {task['title']}: {task.get('description', '')}\n"
+    tasks_text = "".join([
+        f"- [{task['status'].upper()}] {task['title']}: {task.get('description', '')}\n"
+        for task in existing_tasks
+    ])
     
     # AI Analysis Prompt
-    analysis_prompt = f"""Analyze this work session and compare it to the project's existing tasks.
-
-SESSION DATA:
-- Duration: {request.durationMinutes} minutes
-- Summary: {', '.join(request.summaryLines)}
-
-ACTIVITY LOG:
-{activity_summary or 'No activity logged'}
-
-USER NOTES:
-{notes_text or 'No notes'}
-
-EXISTING PROJECT TASKS:
-{tasks_text or 'No tasks defined yet'}
-
-ANALYZE AND RETURN JSON:
-{{
-    "updatedTasks": [
-        {{"taskId": "task_id_if_exists", "title": "Task title", "status": "done|in_progress", "wasUpdated": true, "reason": "Why this task was updated"}}
-    ],
-    "newTasks": [
-        {{"title": "New task title", "description": "What needs to be done", "priority": "high|medium|low", "reason": "Why this task was identified"}}
-    ],
-    "issues": [
-        "Any concerns, blockers, or deviations from plan"
-    ],
-    "aiSummary": "One paragraph summary of what was accomplished and project status"
-}}
-
-RULES:
-1. Only mark tasks as "done" if the work clearly completed them
-2. Mark tasks as "in_progress" if work started but not finished
-3. Add newTasks only for clear follow-up work identified
-4. Add issues if: work took longer than expected, blocked on something, or deviated from plan
-5. Be concise but specific in the aiSummary
-
-Return ONLY valid JSON, no other text."""
+    analysis_prompt = SESSION_ANALYSIS_PROMPT.format(
+        duration_minutes=request.durationMinutes,
+        summary=_join_items(request.summaryLines),
+        activity_summary=activity_summary or "No activity logged",
+        notes_text=notes_text or "No notes",
+        tasks_text=tasks_text or "No tasks defined yet"
+    )
 
     try:
-        llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0.3,
-            api_key=settings.OPENAI_API_KEY
-        )
-        
-        response = await llm.ainvoke([HumanMessage(content=analysis_prompt)])
+        async with _SESSION_ANALYSIS_SEM:
+            response = await _LLM_ANALYZE.ainvoke(_human_prompt(analysis_prompt))
         content = response.content
         
         # Parse JSON
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-        
-        result = json.loads(content)
+        result = parse_llm_json(content)
         
-        # Update tasks in database
-        updated_task_ids = []
+        # Last status listed for a task wins, as with one UPDATE per task
+        status_by_task: Dict[str, str] = {}
         for updated in result.get("updatedTasks", []):
             if updated.get("wasUpdated") and updated.get("taskId"):
-                task_id = updated["taskId"]
-                new_status = updated.get("status", "in_progress")
-                
-                supabase.table("tasks")\
-                    .update({"status": new_status})\
-                    .eq("id", task_id)\
-                    .execute()
-                updated_task_ids.append(task_id)
+                status_by_task[updated["taskId"]] = updated.get("status", "in_progress")
+        
+        # Update tasks in database - one UPDATE per distinct status
+        task_ids_by_status: Dict[str, List[str]] = {}
+        for task_id, new_status in status_by_task.items():
+            task_ids_by_status.setdefault(new_status, []).append(task_id)
+        
+        writes = [
+            execute_query(
+                supabase.table("tasks")
+                .update({"status": new_status})
+                .in_("id", task_ids)
+            )
+            for new_status, task_ids in task_ids_by_status.items()
+        ]
+        
+        # Insert new tasks in a single request
+        new_tasks = [
+            {
+                "brief_id": brief_id,
+                "title": new_task["title"],
+                "description": new_task.get("description", ""),
+                "priority": new_task.get("priority", "medium"),
+                "status": "todo",
+                "role": "dev"  # Default role
+            }
+            for new_task in result.get("newTasks", [])
+        ] if brief_id else []
+        if new_tasks:
+            writes.append(execute_query(supabase.table("tasks").insert(new_tasks)))
+        
+        write_results = await asyncio.gather(*writes, return_exceptions=True)
         
-        # Insert new tasks
         new_task_ids = []
-        for new_task in result.get("newTasks", []):
-            if brief_id:
-                insert_result = supabase.table("tasks")\
-                    .insert({
-                        "brief_id": brief_id,
-                        "title": new_task["title"],
-                        "description": new_task.get("description", ""),
-                        "priority": new_task.get("priority", "medium"),
-                        "status": "todo",
-                        "role": "dev"  # Default role
-                    })\
-                    .execute()
-                if insert_result.data:
-                    new_task_ids.append(insert_result.data[0]["id"])
+        if new_tasks:
+            insert_result = write_results.pop()
+            if isinstance(insert_result, Exception):
+                # Nothing was inserted, so the client can safely retry
+                raise insert_result
+            new_task_ids = [task["id"] for task in insert_result.data or []]
+        
+        # New tasks are committed by now: a failed status update is logged
+        # rather than failing the request, which a retry would duplicate
+        updated_task_ids = []
+        for (new_status, task_ids), write_result in zip(task_ids_by_status.items(), write_results):
+            if isinstance(write_result, Exception):
+                logger.error("Task status update to %s failed: %s", new_status, write_result)
+            else:
+                updated_task_ids.extend(task_ids)
         
         # Update submission with analysis
         if request.submissionId:
-            supabase.table("submissions")\
+            await execute_query(
+                supabase.table("submissions")
                 .update({
                     "ai_analysis": result.get("aiSummary"),
                     "status": "reviewed"
-                })\
-                .eq("id", request.submissionId)\
-                .execute()
+                })
+                .eq("id", request.submissionId)
+            )
         
         # Notify web clients
-        try:
-            await websocket_manager.broadcast_event(
-                "workspace:updated",
-                {
-                    "sessionId": request.sessionId,
-                    "briefId": brief_id,
-                    "updatedTaskIds": updated_task_ids,
-                    "newTaskIds": new_task_ids,
-                    "issues": result.get("issues", []),
-                    "aiSummary": result.get("aiSummary", "")
-                },
-                org_id
-            )
-        except:
-            pass
+        websocket_manager.publish(
+            "workspace:updated",
+            {
+                "sessionId": request.sessionId,
+                "briefId": brief_id,
+                "updatedTaskIds": updated_task_ids,
+                "newTaskIds": new_task_ids,
+                "issues": result.get("issues", []),
+                "aiSummary": result.get("aiSummary", "")
+            },
+            org_id
+        )
         
         return result
         
     except json.JSONDecodeError as e:
-        print(f"JSON parse error: {e}")
+        logger.error("JSON parse error: %s", e)
         return {
             "updatedTasks": [],
             "newTasks": [],
@@ -828,10 +1088,45 @@ Return ONLY valid JSON, no other text."""
             "aiSummary": "Session recorded but analysis failed. Please review manually."
         }
     except Exception as e:
-        print(f"Session analysis error: {e}")
+        logger.error("Session analysis error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Largest client frame accepted on the desktop socket (heartbeats/auth/activity are tiny)
+MAX_WS_FRAME_SIZE = 4096
+
+# Constant frames for the desktop socket, encoded once at import
+_PONG_FRAME = orjson.dumps({"type": "pong"}).decode()
+_AUTH_FAILED_FRAME = orjson.dumps({"type": "error", "message": "Authentication failed"}).decode()
+
+
+async def _send_frame(websocket: WebSocket, message: Dict[str, Any]):
+    """Send a JSON text frame encoded with orjson."""
+    await websocket.send_text(orjson.dumps(message).decode())
+
+
+async def _receive_frame(websocket: WebSocket) -> Optional[Dict[str, Any]]:
+    """
+    Receive one JSON frame (text or binary) and decode it with orjson.
+    
+    Returns None if the frame exceeds MAX_WS_FRAME_SIZE bytes. Memory per
+    frame is bounded server-wide by uvicorn's ws_max_size (WS_MAX_SIZE).
+    
+    Raises:
+        WebSocketDisconnect: If the client went away
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    
+    raw = message.get("text") or message.get("bytes") or b""
+    # Measure bytes, not characters (uvicorn's ws_max_size bounds the buffering)
+    size = len(raw) if isinstance(raw, bytes) else len(raw.encode())
+    if size > MAX_WS_FRAME_SIZE:
+        return None
+    return orjson.loads(raw)
+
+
 @router.websocket("/desktop/ws")
 async def desktop_websocket(websocket: WebSocket):
     """
@@ -848,39 +1143,39 @@ async def desktop_websocket(websocket: WebSocket):
     
     try:
         while True:
-            data = await websocket.receive_json()
+            data = await _receive_frame(websocket)
+            if data is None:
+                await websocket.close(code=1009)  # Message too big
+                return
             event_type = data.get("type")
             
             if event_type == "authenticate":
-                token = data.get("token", "").replace("Bearer ", "")
+                token = data.get("token", "").removeprefix("Bearer ")
                 try:
-                    user_info = await verify_clerk_token(token)
+                    user_info = await cached_verify_clerk_token(token)
                     user_id = user_info["userId"]
                     org_id = user_info.get("orgId")
                     
-                    await websocket.send_json({
+                    await _send_frame(websocket, {
                         "type": "authenticated",
                         "userId": user_id,
                         "orgId": org_id
                     })
                 except Exception:
-                    await websocket.send_json({
-                        "type": "error",
-                        "message": "Authentication failed"
-                    })
+                    await websocket.send_text(_AUTH_FAILED_FRAME)
             
             elif event_type == "heartbeat":
-                await websocket.send_json({"type": "pong"})
+                await websocket.send_text(_PONG_FRAME)
             
             elif event_type == "activity" and user_id:
                 # Could store real-time activity here
-                await websocket.send_json({
+                await _send_frame(websocket, {
                     "type": "activity_ack",
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": datetime.now(timezone.utc).isoformat()
                 })
             
             else:
-                await websocket.send_json({
+                await _send_frame(websocket, {
                     "type": "error",
                     "message": f"Unknown event: {event_type}"
                 })
@@ -888,4 +1183,4 @@ async def desktop_websocket(websocket: WebSocket):
     except WebSocketDisconnect:
         pass
     except Exception as e:
-        print(f"Desktop WebSocket error: {e}")
+        logger.error("Desktop WebSocket error: %s", e)
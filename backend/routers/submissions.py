@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Header, status, Query
+import asyncio
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from datetime import datetime
 from typing import Dict, Any, Optional
+from cachetools import LRUCache
 from models.schemas import SubmissionPayload
-from services.clerk_auth import get_current_user
-from services.supabase_client import get_supabase
+from services.clerk_auth import require_user
+from services.supabase_client import get_supabase, execute_query
 from services.agent_manager import get_agent_manager, AgentManager
 from services.websocket_manager import get_websocket_manager
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Columns _map_submission reads (plus what update_submission_status needs)
+SUBMISSION_COLS = "id, brief_id, user_id, user_name, role, summary_lines, duration_minutes, matched_tasks, status, created_at"
+
 
 def _map_submission(submission: Dict[str, Any]) -> Dict[str, Any]:
     return {
@@ -25,10 +33,34 @@ def _map_submission(submission: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+# Mapped list rows: (id, status, matched_tasks) -> _map_submission output.
+# status and matched_tasks are the only mapped columns that change after insert
+# (both via PATCH), so an updated row naturally misses the cache.
+_mapped_submission_cache: LRUCache = LRUCache(maxsize=1024)
+
+
+def _map_submission_cached(submission: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    _map_submission for list responses, reusing the mapping of rows seen before.
+    
+    The returned dict is shared between requests - callers must not mutate it.
+    """
+    key = (
+        submission.get("id"),
+        submission.get("status"),
+        tuple(submission.get("matched_tasks") or ())
+    )
+    mapped = _mapped_submission_cache.get(key)
+    if mapped is None:
+        mapped = _map_submission(submission)
+        _mapped_submission_cache[key] = mapped
+    return mapped
+
+
 @router.post("/submissions", status_code=status.HTTP_201_CREATED)
 async def create_submission(
     payload: SubmissionPayload,
-    authorization: str = Header(...),
+    user: dict = Depends(require_user),
     agent_manager: AgentManager = Depends(get_agent_manager)
 ):
     """
@@ -40,11 +72,13 @@ async def create_submission(
     3. Store submission in database
     4. Broadcast WebSocket event to team
     """
-    user = await get_current_user(authorization)
     supabase = get_supabase()
     
-    # Verify brief exists and user has access
-    brief_response = supabase.table("briefs").select("*").eq("id", payload.briefId).eq("org_id", user["orgId"]).single().execute()
+    # Verify brief exists and user has access; fetch its tasks for matching alongside
+    brief_response, tasks_response = await asyncio.gather(
+        execute_query(supabase.table("briefs").select("name, description").eq("id", payload.briefId).eq("org_id", user["orgId"]).single()),
+        execute_query(supabase.table("tasks").select("id, title, description").eq("brief_id", payload.briefId))
+    )
     
     if not brief_response.data:
         raise HTTPException(
@@ -53,44 +87,46 @@ async def create_submission(
         )
     
     brief = brief_response.data
-    
-    # Get tasks for matching
-    tasks_response = supabase.table("tasks").select("*").eq("brief_id", payload.briefId).execute()
     tasks = tasks_response.data or []
     
-    # Agent 1: Submission Analysis (enhance summary)
-    try:
-        submission_agent = agent_manager.get_agent("submission")
-        analysis = await submission_agent.analyze_submission(
-            activities=[act.model_dump() for act in payload.activities],
+    # Serialize once; both agents read the same lists
+    activities_dump = [act.model_dump() for act in payload.activities]
+    snippets_dump = [snip.model_dump() for snip in payload.snippets] if payload.snippets else None
+    
+    # Agents 1 and 2 don't depend on each other - run them concurrently
+    submission_agent = agent_manager.get_agent("submission")
+    matching_agent = agent_manager.get_agent("matching")
+    analysis, matched_task_ids = await asyncio.gather(
+        submission_agent.analyze_submission(
+            activities=activities_dump,
             role=payload.role,
             brief_context=f"{brief['name']}: {brief['description']}"
-        )
-        
-        # Use enhanced summary from agent
-        final_summary = analysis.get("summary", payload.summary)
-        
-    except Exception as e:
-        print(f"Submission analysis error: {e}")
+        ),
+        matching_agent.match_tasks(
+            tasks=tasks,
+            summary=payload.summary,
+            activities=activities_dump,
+            snippets=snippets_dump
+        ),
+        return_exceptions=True
+    )
+    
+    # Agent 1: Submission Analysis (enhance summary)
+    if isinstance(analysis, Exception):
+        logger.error("Submission analysis error: %s", analysis)
         # Fallback to user-provided summary
         final_summary = payload.summary
+    else:
+        # Use enhanced summary from agent
+        final_summary = analysis.get("summary", payload.summary)
     
     # Agent 2: Task Matching
-    try:
-        matching_agent = agent_manager.get_agent("matching")
-        matched_task_ids = await matching_agent.match_tasks(
-            tasks=tasks,
-            summary=payload.summary,
-            activities=[act.model_dump() for act in payload.activities],
-            snippets=[snip.model_dump() for snip in payload.snippets] if payload.snippets else None
-        )
-        
-    except Exception as e:
-        print(f"Task matching error: {e}")
+    if isinstance(matched_task_ids, Exception):
+        logger.error("Task matching error: %s", matched_task_ids)
         # Fallback to empty matches
         matched_task_ids = []
     
-    # Store submission
+    # Store submission with its activities
     submission_data = {
         "brief_id": payload.briefId,
         "user_id": user["userId"],
@@ -102,7 +138,10 @@ async def create_submission(
         "status": "pending"
     }
     
-    submission_response = supabase.table("submissions").insert(submission_data).execute()
+    # Submission and its activities are written in one transaction (migration 004)
+    submission_response = await execute_query(
+        supabase.rpc("create_submission_with_activities", {"sub": submission_data, "acts": activities_dump})
+    )
     
     if not submission_response.data:
         raise HTTPException(
@@ -110,42 +149,19 @@ async def create_submission(
             detail={"code": "INTERNAL_ERROR", "message": "Failed to create submission"}
         )
     
-    submission = submission_response.data[0]
-    
-    # Store activities in separate table (optional)
-    if payload.activities:
-        activities_data = [
-            {
-                "submission_id": submission["id"],
-                "app": act.app,
-                "title": act.title,
-                "summary": act.summary,
-                "duration": act.duration,
-                "timestamp": act.timestamp
-            }
-            for act in payload.activities
-        ]
-        
-        try:
-            supabase.table("submission_activities").insert(activities_data).execute()
-        except Exception as e:
-            print(f"Failed to store activities: {e}")
+    submission = submission_response.data
     
-    # Broadcast WebSocket event
-    try:
-        ws_manager = get_websocket_manager()
-        await ws_manager.broadcast_event(
-            event_type="submission:new",
-            payload={
-                "submissionId": submission["id"],
-                "briefId": payload.briefId,
-                "userId": user["userId"],
-                "userName": payload.userName
-            },
-            org_id=user["orgId"]
-        )
-    except Exception as e:
-        print(f"WebSocket broadcast error: {e}")
+    # Broadcast WebSocket event (queued, delivered in the background)
+    get_websocket_manager().publish(
+        event_type="submission:new",
+        payload={
+            "submissionId": submission["id"],
+            "briefId": payload.briefId,
+            "userId": user["userId"],
+            "userName": payload.userName
+        },
+        org_id=user["orgId"]
+    )
     
     # Return response
     return _map_submission(submission)
@@ -154,14 +170,17 @@ async def create_submission(
 @router.get("/submissions/{submission_id}")
 async def get_submission(
     submission_id: str,
-    authorization: str = Header(...),
+    user: dict = Depends(require_user),
 ):
     """Get details of a specific submission"""
-    user = await get_current_user(authorization)
     supabase = get_supabase()
     
-    # Get submission
-    response = supabase.table("submissions").select("*").eq("id", submission_id).execute()
+    # Submission, its brief's org and its activities in one embedded select
+    response = await execute_query(
+        supabase.table("submissions")
+        .select(f"{SUBMISSION_COLS}, brief:briefs(org_id), activities:submission_activities(*)")
+        .eq("id", submission_id)
+    )
     
     if not response.data:
         raise HTTPException(
@@ -172,26 +191,22 @@ async def get_submission(
     submission = response.data[0]
     
     # Verify access (must be in same org as brief)
-    brief = supabase.table("briefs").select("org_id").eq("id", submission["brief_id"]).single().execute()
+    brief = submission.get("brief")
     
-    if not brief.data or brief.data["org_id"] != user["orgId"]:
+    if not brief or brief["org_id"] != user["orgId"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail={"code": "FORBIDDEN", "message": "Access denied"}
         )
     
-    # Get activities
-    activities_response = supabase.table("submission_activities").select("*").eq("submission_id", submission_id).execute()
-    activities = activities_response.data or []
-    
     result = _map_submission(submission)
-    result["activities"] = activities
+    result["activities"] = submission.get("activities") or []
     return result
 
 
 @router.get("/submissions")
 async def list_submissions(
-    authorization: str = Header(...),
+    user: dict = Depends(require_user),
     status_filter: Optional[str] = Query(None, alias="status", regex="^(pending|approved|rejected)$"),
     brief_id: Optional[str] = Query(None, alias="briefId"),
     user_id: Optional[str] = Query(None, alias="userId"),
@@ -199,32 +214,23 @@ async def list_submissions(
     offset: int = Query(0, ge=0),
 ):
     """List submissions for the current organization"""
-    user = await get_current_user(authorization)
     supabase = get_supabase()
 
-    query = supabase.table("submissions").select("*")
-
-    if status_filter:
-        query = query.eq("status", status_filter)
-    if brief_id:
-        query = query.eq("brief_id", brief_id)
-    if user_id:
-        query = query.eq("user_id", user_id)
-
-    query = query.limit(limit).offset(offset).order("created_at", desc=True)
+    # Org check, filters and paging all run in the DB (migration 005)
+    query = supabase.rpc("list_org_submissions", {
+        "p_org": user["orgId"],
+        "p_status": status_filter,
+        "p_brief": brief_id,
+        "p_user": user_id,
+        "p_limit": limit,
+        "p_offset": offset
+    }).select(SUBMISSION_COLS)
 
-    response = query.execute()
+    response = await execute_query(query)
     submissions = response.data or []
 
-    if submissions:
-        brief_ids = list({sub["brief_id"] for sub in submissions if sub.get("brief_id")})
-        if brief_ids:
-            briefs_response = supabase.table("briefs").select("id, org_id").in_("id", brief_ids).execute()
-            allowed_brief_ids = {brief["id"] for brief in (briefs_response.data or []) if brief.get("org_id") == user["orgId"]}
-            submissions = [sub for sub in submissions if sub.get("brief_id") in allowed_brief_ids]
-
     return {
-        "submissions": [_map_submission(sub) for sub in submissions],
+        "submissions": [_map_submission_cached(sub) for sub in submissions],
         "total": len(submissions),
         "limit": limit,
         "offset": offset
@@ -235,7 +241,7 @@ async def list_submissions(
 async def update_submission_status(
     submission_id: str,
     update_data: dict,
-    authorization: str = Header(...),
+    user: dict = Depends(require_user),
 ):
     """
     Approve or reject a submission.
@@ -244,11 +250,10 @@ async def update_submission_status(
     - If approved: Update matched tasks to 'done'
     - Broadcast WebSocket event
     """
-    user = await get_current_user(authorization)
     supabase = get_supabase()
     
     # Get submission
-    submission = supabase.table("submissions").select("*").eq("id", submission_id).single().execute()
+    submission = await execute_query(supabase.table("submissions").select(SUBMISSION_COLS).eq("id", submission_id).single())
     
     if not submission.data:
         raise HTTPException(
@@ -257,9 +262,10 @@ async def update_submission_status(
         )
     
     sub = submission.data
+    brief_id = sub["brief_id"]
     
     # Verify access
-    brief = supabase.table("briefs").select("org_id").eq("id", sub["brief_id"]).single().execute()
+    brief = await execute_query(supabase.table("briefs").select("org_id").eq("id", brief_id).single())
     
     if not brief.data or brief.data["org_id"] != user["orgId"]:
         raise HTTPException(
@@ -276,7 +282,11 @@ async def update_submission_status(
     if "matchedTasks" in update_data:
         update_payload["matched_tasks"] = update_data["matchedTasks"]
     
-    updated = supabase.table("submissions").update(update_payload).eq("id", submission_id).execute()
+    # Matched tasks after this update
+    matched_task_ids = update_payload.get("matched_tasks", sub.get("matched_tasks")) or []
+    approve_tasks = update_data.get("status") == "approved" and bool(matched_task_ids)
+    
+    updated = await execute_query(supabase.table("submissions").update(update_payload).eq("id", submission_id))
     
     if not updated.data:
         raise HTTPException(
@@ -284,30 +294,28 @@ async def update_submission_status(
             detail={"code": "INTERNAL_ERROR", "message": "Failed to update submission"}
         )
     
-    # If approved, update tasks to 'done'
-    if update_data.get("status") == "approved" and updated.data[0].get("matched_tasks"):
-        for task_id in updated.data[0]["matched_tasks"]:
-            try:
-                supabase.table("tasks").update({"status": "done"}).eq("id", task_id).execute()
-            except Exception as e:
-                print(f"Failed to update task {task_id}: {e}")
-        
-        # Broadcast tasks updated event
+    row = updated.data[0]
+    
+    # If approved, update matched tasks to 'done' - only once the submission
+    # write succeeded, in one IN-list update
+    if approve_tasks:
         try:
-            ws_manager = get_websocket_manager()
-            await ws_manager.broadcast_event(
-                event_type="tasks:updated",
-                payload={
-                    "briefId": sub["brief_id"],
-                    "taskIds": updated.data[0]["matched_tasks"]
-                },
-                org_id=user["orgId"]
-            )
+            await execute_query(supabase.table("tasks").update({"status": "done"}).in_("id", matched_task_ids))
         except Exception as e:
-            print(f"WebSocket broadcast error: {e}")
+            logger.error("Failed to update tasks %s: %s", matched_task_ids, e)
+        
+        # Broadcast tasks updated event (queued, delivered in the background)
+        get_websocket_manager().publish(
+            event_type="tasks:updated",
+            payload={
+                "briefId": brief_id,
+                "taskIds": matched_task_ids
+            },
+            org_id=user["orgId"]
+        )
     
     return {
-        "id": updated.data[0]["id"],
-        "status": updated.data[0]["status"],
-        "updatedAt": datetime.utcnow().isoformat()
+        "id": row["id"],
+        "status": row["status"],
+        "updatedAt": datetime.utcnow()
     }
@@ -1,48 +1,33 @@
+import logging
 from fastapi import APIRouter, Header, HTTPException, status
 from typing import Dict, Any
 
 from services.clerk_auth import get_current_user
-from services.supabase_client import get_supabase
+from services.supabase_client import get_supabase, execute_query
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-def _upsert_user(user: Dict[str, Any]) -> Dict[str, Any]:
+async def upsert_user(user: Dict[str, Any]) -> Dict[str, Any]:
     supabase = get_supabase()
 
-    existing = supabase.table("users").select("*").eq("id", user["userId"]).execute()
-
-    if existing.data:
-        existing_record = existing.data[0]
-        # Only update org_id if we have a new one (don't overwrite with null)
-        org_id = user["orgId"] or existing_record.get("org_id")
-        
-        user_data = {
-            "email": user["email"],
-            "name": user["name"],
-            "avatar_url": user["avatarUrl"]
-        }
-        # Only update org_id if it's not null
-        if user["orgId"]:
-            user_data["org_id"] = user["orgId"]
-            
-        supabase.table("users").update(user_data).eq("id", user["userId"]).execute()
-        role = existing_record.get("role")  # Can be None if not set yet
-        is_new = False
-    else:
-        org_id = user["orgId"]
-        user_data = {
-            "id": user["userId"],
-            "org_id": org_id,
-            "email": user["email"],
-            "name": user["name"],
-            "avatar_url": user["avatarUrl"]
-        }
-        # DON'T set default role - user must choose in onboarding
-        # role will be NULL until they complete onboarding
-        supabase.table("users").insert(user_data).execute()
-        role = None
-        is_new = True
+    # One round trip: insert, or refresh profile fields while keeping the
+    # stored role and (when the token has none) org_id - see 003_upsert_user.sql
+    result = await execute_query(supabase.rpc("upsert_user", {
+        "p_id": user["userId"],
+        "p_org_id": user["orgId"],
+        "p_email": user["email"],
+        "p_name": user["name"],
+        "p_avatar_url": user["avatarUrl"]
+    }))
+    row = result.data[0]
+    
+    org_id = row["org_id"]
+    is_new = row["is_new"]
+    # New users choose a role in onboarding; otherwise can be None if not set yet
+    role = None if is_new else row["role"]
 
     # Needs onboarding if new OR if role was never set
     needs_onboarding = is_new or role is None
@@ -62,14 +47,15 @@ def _upsert_user(user: Dict[str, Any]) -> Dict[str, Any]:
 @router.get("/users/me")
 async def get_me(authorization: str = Header(None)):
     """Return current user profile and ensure user exists in DB."""
-    print(f"[USERS/ME] Called with auth header: {authorization[:50] if authorization else 'MISSING'}...")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[USERS/ME] Called with auth header: %s...", authorization[:50] if authorization else 'MISSING')
     if not authorization:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"code": "UNAUTHORIZED", "message": "No Authorization header provided"}
         )
     user = await get_current_user(authorization)
-    return _upsert_user(user)
+    return await upsert_user(user)
 
 
 @router.patch("/users/me")
@@ -96,10 +82,10 @@ async def update_me(update_data: Dict[str, Any], authorization: str = Header(...
         updates["org_id"] = org_id
     
     if updates:
-        supabase.table("users").update(updates).eq("id", user["userId"]).execute()
+        await execute_query(supabase.table("users").update(updates).eq("id", user["userId"]))
     
     # Return updated user - merge the org_id from request if token doesn't have it
     if org_id:
         user["orgId"] = org_id
     
-    return _upsert_user(user)
+    return await upsert_user(user)
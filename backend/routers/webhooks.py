@@ -1,27 +1,42 @@
 from fastapi import APIRouter, Request, HTTPException, status
-from services.supabase_client import get_supabase
+from services.supabase_client import get_supabase, execute_query
+import logging
 import hashlib
 import hmac
 import os
+import orjson
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 CLERK_WEBHOOK_SECRET = os.getenv("CLERK_WEBHOOK_SECRET", "")
 
+# Keyed HMAC built once; verify_webhook copies it instead of re-keying per call
+_HMAC_TEMPLATE = (
+    hmac.new(CLERK_WEBHOOK_SECRET.encode(), digestmod=hashlib.sha256)
+    if CLERK_WEBHOOK_SECRET else None
+)
+
 
 def verify_webhook(payload: bytes, signature: str) -> bool:
-    """Verify Clerk webhook signature"""
-    if not CLERK_WEBHOOK_SECRET:
+    """Verify Clerk webhook signature ("sha256=<hex digest>")"""
+    if _HMAC_TEMPLATE is None:
         # In dev mode without secret, accept all
         return True
     
-    expected = hmac.new(
-        CLERK_WEBHOOK_SECRET.encode(),
-        payload,
-        hashlib.sha256
-    ).hexdigest()
+    scheme, _, digest_hex = signature.partition("=")
+    if scheme != "sha256":
+        return False
+    
+    try:
+        received = bytes.fromhex(digest_hex)
+    except ValueError:
+        return False
     
-    return hmac.compare_digest(f"sha256={expected}", signature)
+    mac = _HMAC_TEMPLATE.copy()
+    mac.update(payload)
+    return hmac.compare_digest(received, mac.digest())
 
 
 @router.post("/webhooks/clerk")
@@ -43,65 +58,48 @@ async def clerk_webhook(request: Request):
         raise HTTPException(status_code=400, detail="Invalid signature")
     
     try:
-        data = await request.json()
-    except:
+        data = orjson.loads(payload)
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON")
     
     event_type = data.get("type")
     event_data = data.get("data", {})
     
-    print(f"[WEBHOOK] Received: {event_type}")
+    logger.info("[WEBHOOK] Received: %s", event_type)
     
     supabase = get_supabase()
     
-    # User created
-    if event_type == "user.created":
+    # User created / updated - one upsert also covers updates that arrive first
+    if event_type in ("user.created", "user.updated"):
         user_id = event_data.get("id")
         email = event_data.get("email_addresses", [{}])[0].get("email_address", "")
         name = f"{event_data.get('first_name', '')} {event_data.get('last_name', '')}".strip() or "User"
         avatar = event_data.get("image_url")
         
-        supabase.table("users").upsert({
+        await execute_query(supabase.table("users").upsert({
             "id": user_id,
             "email": email,
             "name": name,
             "avatar_url": avatar
-        }).execute()
-        print(f"[WEBHOOK] Created user: {user_id}")
-    
-    # User updated
-    elif event_type == "user.updated":
-        user_id = event_data.get("id")
-        email = event_data.get("email_addresses", [{}])[0].get("email_address", "")
-        name = f"{event_data.get('first_name', '')} {event_data.get('last_name', '')}".strip() or "User"
-        avatar = event_data.get("image_url")
-        
-        supabase.table("users").update({
-            "email": email,
-            "name": name,
-            "avatar_url": avatar
-        }).eq("id", user_id).execute()
-        print(f"[WEBHOOK] Updated user: {user_id}")
+        }, on_conflict="id"))
+        logger.info("[WEBHOOK] Upserted user (%s): %s", event_type, user_id)
     
-    # User joined organization - THIS IS THE KEY ONE
-    elif event_type == "organizationMembership.created":
+    # User joined / left organization - THIS IS THE KEY ONE
+    elif event_type in ("organizationMembership.created", "organizationMembership.deleted"):
         user_id = event_data.get("public_user_data", {}).get("user_id")
-        org_id = event_data.get("organization", {}).get("id")
+        org_id = (
+            event_data.get("organization", {}).get("id")
+            if event_type == "organizationMembership.created" else None
+        )
         
-        if user_id and org_id:
-            supabase.table("users").update({
+        if user_id and (org_id or event_type == "organizationMembership.deleted"):
+            await execute_query(supabase.table("users").upsert({
+                "id": user_id,
                 "org_id": org_id
-            }).eq("id", user_id).execute()
-            print(f"[WEBHOOK] User {user_id} joined org {org_id}")
-    
-    # User left organization
-    elif event_type == "organizationMembership.deleted":
-        user_id = event_data.get("public_user_data", {}).get("user_id")
-        
-        if user_id:
-            supabase.table("users").update({
-                "org_id": None
-            }).eq("id", user_id).execute()
-            print(f"[WEBHOOK] User {user_id} left org")
+            }, on_conflict="id"))
+            if org_id:
+                logger.info("[WEBHOOK] User %s joined org %s", user_id, org_id)
+            else:
+                logger.info("[WEBHOOK] User %s left org", user_id)
     
     return {"received": True}
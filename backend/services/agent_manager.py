@@ -1,35 +1,53 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 
 
 class AgentManager:
     """
-    Singleton manager for all DRIFT agents.
+    Manager for all DRIFT agents (one shared instance, see get_agent_manager).
     
     Manages agent lifecycle and provides centralized access.
     Lazy-loads agents on first access for efficiency.
     """
     
-    _instance: Optional['AgentManager'] = None
-    _initialized: bool = False
-    
-    def __new__(cls) -> 'AgentManager':
-        """Singleton pattern: ensure only one instance exists"""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-    
     def __init__(self):
-        """Initialize agent manager (only once)"""
-        if self._initialized:
-            return
-        
+        """Initialize agent manager"""
         # Agent instances (lazy-loaded)
         self._brief_agent: Optional[Any] = None
         self._task_matching_agent: Optional[Any] = None
         self._submission_agent: Optional[Any] = None
         self._ui_agent: Optional[Any] = None
         
-        self._initialized = True
+        # agent_type -> loader returning the (memoized) agent
+        self._loaders: Dict[str, Callable[[], Any]] = {
+            "brief": self._load_brief,
+            "matching": self._load_matching,
+            "submission": self._load_submission,
+            "ui": self._load_ui,
+        }
+    
+    def _load_brief(self) -> Any:
+        if self._brief_agent is None:
+            from agents.brief_agent import BriefProcessingAgent
+            self._brief_agent = BriefProcessingAgent()
+        return self._brief_agent
+    
+    def _load_matching(self) -> Any:
+        if self._task_matching_agent is None:
+            from agents.task_matching_agent import TaskMatchingAgent
+            self._task_matching_agent = TaskMatchingAgent()
+        return self._task_matching_agent
+    
+    def _load_submission(self) -> Any:
+        if self._submission_agent is None:
+            from agents.submission_agent import SubmissionAnalysisAgent
+            self._submission_agent = SubmissionAnalysisAgent()
+        return self._submission_agent
+    
+    def _load_ui(self) -> Any:
+        if self._ui_agent is None:
+            from agents.generative_ui_agent import GenerativeUIAgent
+            self._ui_agent = GenerativeUIAgent()
+        return self._ui_agent
     
     def get_agent(self, agent_type: str) -> Any:
         """
@@ -44,56 +62,35 @@ class AgentManager:
         Raises:
             ValueError: If agent_type is invalid
         """
-        if agent_type == "brief":
-            if self._brief_agent is None:
-                from agents.brief_agent import BriefProcessingAgent
-                self._brief_agent = BriefProcessingAgent()
-            return self._brief_agent
-        
-        elif agent_type == "matching":
-            if self._task_matching_agent is None:
-                from agents.task_matching_agent import TaskMatchingAgent
-                self._task_matching_agent = TaskMatchingAgent()
-            return self._task_matching_agent
-        
-        elif agent_type == "submission":
-            if self._submission_agent is None:
-                from agents.submission_agent import SubmissionAnalysisAgent
-                self._submission_agent = SubmissionAnalysisAgent()
-            return self._submission_agent
-        
-        elif agent_type == "ui":
-            if self._ui_agent is None:
-                from agents.generative_ui_agent import GenerativeUIAgent
-                self._ui_agent = GenerativeUIAgent()
-            return self._ui_agent
-        
-        else:
-            raise ValueError(f"Unknown agent type: {agent_type}")
+        try:
+            loader = self._loaders[agent_type]
+        except KeyError:
+            raise ValueError(f"Unknown agent type: {agent_type}") from None
+        return loader()
     
     @property
     def brief_agent(self):
         """Get Brief Processing Agent"""
-        return self.get_agent("brief")
+        return self._load_brief()
     
     @property
     def task_matching_agent(self):
         """Get Task Matching Agent"""
-        return self.get_agent("matching")
+        return self._load_matching()
     
     @property
     def submission_agent(self):
         """Get Submission Analysis Agent"""
-        return self.get_agent("submission")
+        return self._load_submission()
     
     @property
     def ui_agent(self):
         """Get Generative UI Agent"""
-        return self.get_agent("ui")
+        return self._load_ui()
 
 
 # Global agent manager instance
-_agent_manager_instance: Optional[AgentManager] = None
+_agent_manager_instance = AgentManager()
 
 
 def get_agent_manager() -> AgentManager:
@@ -101,9 +98,6 @@ def get_agent_manager() -> AgentManager:
     Dependency injection function for FastAPI.
     
     Returns:
-        AgentManager singleton instance
+        Shared AgentManager instance
     """
-    global _agent_manager_instance
-    if _agent_manager_instance is None:
-        _agent_manager_instance = AgentManager()
     return _agent_manager_instance
@@ -1,30 +1,90 @@
+import logging
 import jwt
 import httpx
-from fastapi import HTTPException, status
+import asyncio
+import hashlib
+import time
+from cachetools import TTLCache
+from fastapi import Header, HTTPException, status
 from config.settings import settings
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 # Clerk JWKS endpoint
 CLERK_JWKS_URL = "https://fine-shrew-58.clerk.accounts.dev/.well-known/jwks.json"
 
-# Cache for JWKS
-_jwks_cache: Optional[dict] = None
+# Parsed JWKS signing keys by kid
+_jwks_cache: Optional[Dict[str, Any]] = None
+_jwks_fetched_at = 0.0
+_jwks_attempted_at = 0.0
+_jwks_lock = asyncio.Lock()
+
+# Seconds before cached JWKS keys are refetched
+JWKS_TTL = 3600
+
+# Minimum seconds between forced JWKS refetches (unknown kid, e.g. key rotation)
+JWKS_REFRESH_INTERVAL = 60
 
+# Shared client so JWKS refetches reuse a warm connection (closed on shutdown)
+_jwks_http = httpx.AsyncClient(timeout=5, http2=True)
 
-async def get_jwks() -> dict:
-    """Fetch Clerk JWKS (JSON Web Key Set)"""
-    global _jwks_cache
+# Verified tokens: blake2b(token) -> (exp, user info). Raw JWTs are never kept.
+# Entries live at most 60s and are never served past the token's own exp.
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+
+async def get_jwks(force: bool = False) -> Dict[str, Any]:
+    """
+    Return Clerk's JWKS signing keys, parsed and keyed by kid.
     
-    if _jwks_cache is not None:
+    Fetched under a lock so concurrent cold requests share one fetch, and
+    refetched after JWKS_TTL. force=True refetches (for an unknown kid).
+    Refetches happen at most once per JWKS_REFRESH_INTERVAL; if one fails
+    the previous keys keep being served.
+    """
+    global _jwks_cache, _jwks_fetched_at, _jwks_attempted_at
+    
+    def is_fresh() -> bool:
+        if _jwks_cache is None:
+            return False
+        now = time.monotonic()
+        if now - _jwks_attempted_at < JWKS_REFRESH_INTERVAL:
+            return True
+        return not force and now - _jwks_fetched_at < JWKS_TTL
+    
+    if is_fresh():
         return _jwks_cache
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(CLERK_JWKS_URL)
-        response.raise_for_status()
-        _jwks_cache = response.json()
+    async with _jwks_lock:
+        # Another request may have (re)fetched while we waited
+        if is_fresh():
+            return _jwks_cache
+        
+        _jwks_attempted_at = time.monotonic()
+        try:
+            response = await _jwks_http.get(CLERK_JWKS_URL)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            if _jwks_cache is None:
+                raise
+            logger.warning("[AUTH] JWKS refresh failed, keeping cached keys: %s", e)
+            return _jwks_cache
+        
+        _jwks_cache = {
+            key["kid"]: jwt.algorithms.RSAAlgorithm.from_jwk(key)
+            for key in response.json().get("keys", [])
+            if key.get("kid")
+        }
+        _jwks_fetched_at = _jwks_attempted_at
         return _jwks_cache
 
 
+async def close_jwks_client() -> None:
+    """Close the shared JWKS HTTP client (call from app shutdown)."""
+    await _jwks_http.aclose()
+
+
 async def verify_clerk_token(token: str) -> dict:
     """
     Verify Clerk JWT token and return user info.
@@ -38,19 +98,52 @@ async def verify_clerk_token(token: str) -> dict:
     Raises:
         HTTPException: If token is invalid
     """
+    _, user_info = await _verify_clerk_token(token)
+    return user_info
+
+
+async def cached_verify_clerk_token(token: str) -> dict:
+    """
+    Like verify_clerk_token, but reuses the result for a token that was
+    already verified and has not expired yet.
+    
+    Args:
+        token: JWT token from Authorization header
+        
+    Returns:
+        dict with userId, orgId, email, name
+        
+    Raises:
+        HTTPException: If token is invalid
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    
+    cached = _token_cache.get(key)
+    if cached is not None and cached[0] > time.time():
+        return dict(cached[1])
+    
+    try:
+        exp, user_info = await _verify_clerk_token(token)
+    except HTTPException:
+        _token_cache.pop(key, None)
+        raise
+    _token_cache[key] = (exp, user_info)
+    return dict(user_info)
+
+
+async def _verify_clerk_token(token: str) -> Tuple[float, dict]:
+    """Verify a Clerk JWT and return its expiry timestamp and user info."""
     try:
         # Get JWKS
         jwks = await get_jwks()
         
         # Get unverified header to find the key
-        unverified_header = jwt.get_unverified_header(token)
+        kid = jwt.get_unverified_header(token).get("kid")
         
-        # Find the matching key
-        rsa_key = None
-        for key in jwks.get("keys", []):
-            if key.get("kid") == unverified_header.get("kid"):
-                rsa_key = jwt.algorithms.RSAAlgorithm.from_jwk(key)
-                break
+        # Find the matching key; an unknown kid may mean Clerk rotated keys
+        rsa_key = jwks.get(kid)
+        if rsa_key is None:
+            rsa_key = (await get_jwks(force=True)).get(kid)
         
         if rsa_key is None:
             raise ValueError("No matching key found in JWKS")
@@ -67,11 +160,11 @@ async def verify_clerk_token(token: str) -> dict:
         user_id = payload.get("sub")
         org_id = payload.get("org_id")
         
-        print(f"[AUTH] SUCCESS: user_id={user_id}, org_id={org_id}")
+        logger.debug("[AUTH] SUCCESS: user_id=%s, org_id=%s", user_id, org_id)
         
         # Clerk session tokens have limited claims
         # For full user data, we'd need to call the Clerk API
-        return {
+        return payload.get("exp", 0), {
             "userId": user_id,
             "orgId": org_id,
             "email": payload.get("email"),
@@ -80,7 +173,7 @@ async def verify_clerk_token(token: str) -> dict:
         }
         
     except jwt.ExpiredSignatureError:
-        print(f"[AUTH] REJECTED: Token expired")
+        logger.info("[AUTH] REJECTED: Token expired")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={
@@ -89,7 +182,7 @@ async def verify_clerk_token(token: str) -> dict:
             }
         )
     except jwt.InvalidTokenError as e:
-        print(f"[AUTH] REJECTED: Invalid token - {str(e)}")
+        logger.info("[AUTH] REJECTED: Invalid token - %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={
@@ -98,7 +191,7 @@ async def verify_clerk_token(token: str) -> dict:
             }
         )
     except Exception as e:
-        print(f"[AUTH] REJECTED: Exception - {str(e)}")
+        logger.info("[AUTH] REJECTED: Exception - %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={
@@ -121,10 +214,11 @@ async def get_current_user(authorization: str) -> dict:
     Raises:
         HTTPException: If auth fails
     """
-    print(f"[AUTH] Received authorization header: {authorization[:50] if authorization else 'None'}...")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[AUTH] Received authorization header: %s...", authorization[:50] if authorization else 'None')
     
     if not authorization or not authorization.startswith("Bearer "):
-        print(f"[AUTH] REJECTED: Missing or invalid header format")
+        logger.info("[AUTH] REJECTED: Missing or invalid header format")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={
@@ -133,6 +227,26 @@ async def get_current_user(authorization: str) -> dict:
             }
         )
     
-    token = authorization.replace("Bearer ", "")
-    print(f"[AUTH] Token length: {len(token)}, starts with: {token[:20]}...")
-    return await verify_clerk_token(token)
+    token = authorization[7:]  # prefix checked above
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[AUTH] Token length: %s, starts with: %s...", len(token), token[:20])
+    return await cached_verify_clerk_token(token)
+
+
+async def require_user(authorization: str = Header(...)) -> dict:
+    """
+    FastAPI dependency resolving the authenticated user.
+    
+    FastAPI caches a dependency's result for the rest of the request, so
+    other dependencies declaring Depends(require_user) share one lookup.
+    
+    Args:
+        authorization: Authorization header value
+        
+    Returns:
+        User dict
+        
+    Raises:
+        HTTPException: If auth fails
+    """
+    return await get_current_user(authorization)
@@ -1,13 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+import asyncio
+
+import httpx
+from postgrest.utils import SyncClient
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
 from config.settings import settings
 
+# PostgREST request timeout (seconds)
+POSTGREST_TIMEOUT = 10
+
+# Seconds an idle pooled connection is kept open for reuse
+KEEPALIVE_EXPIRY = 30
+
 # Initialize Supabase client
 supabase: Client = create_client(
     settings.SUPABASE_URL,
-    settings.SUPABASE_KEY
+    settings.SUPABASE_KEY,
+    options=ClientOptions(postgrest_client_timeout=POSTGREST_TIMEOUT)
 )
 
 
+def _pooled_postgrest_session(client: Client) -> SyncClient:
+    """
+    Build the shared HTTP/2 session PostgREST queries go through.
+    
+    supabase-py's default session keeps only 20 idle connections, fewer
+    than the executor has workers, so bursts kept re-doing TCP/TLS setup.
+    """
+    default = client.postgrest.session
+    session = SyncClient(
+        base_url=default.base_url,
+        headers=default.headers,
+        timeout=POSTGREST_TIMEOUT,
+        follow_redirects=True,
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=50,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        )
+    )
+    default.close()
+    return session
+
+
+supabase.postgrest.session = _pooled_postgrest_session(supabase)
+
+# supabase-py is synchronous; blocking queries run here instead of on the
+# event loop (or in Starlette's shared threadpool used by sync endpoints)
+_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="supabase")
+
+
 def get_supabase() -> Client:
     """
     Dependency to get Supabase client.
@@ -16,3 +61,31 @@ def get_supabase() -> Client:
         Supabase client instance
     """
     return supabase
+
+
+async def execute_query(query: Any) -> Any:
+    """
+    Execute a built Supabase query without blocking the event loop.
+    
+    Args:
+        query: Query builder (e.g. supabase.table("x").select("*").eq(...))
+        
+    Returns:
+        The query's APIResponse
+    """
+    return await run_blocking(query.execute)
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a blocking supabase-py call (e.g. storage) on the Supabase executor.
+    
+    Args:
+        func: Callable to run
+        *args: Positional arguments for func
+        
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, func, *args)
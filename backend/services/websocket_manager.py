@@ -1,6 +1,57 @@
-from typing import Dict, Set
+from typing import Dict, List, Optional, Tuple, Union
 from fastapi import WebSocket
-import json
+import logging
+import asyncio
+import msgpack
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Max events waiting to be broadcast before new ones are dropped
+BROADCAST_QUEUE_SIZE = 10000
+
+# Max frames buffered per client; when full the oldest frame is dropped
+CLIENT_QUEUE_SIZE = 64
+
+# Subprotocol a client offers to receive MessagePack binary frames instead of JSON text
+MSGPACK_SUBPROTOCOL = "msgpack"
+
+# Query param (?batch=1) a client sets to receive bursts as one
+# {"type": "batch", "items": [...]} frame; other clients get one frame per event
+BATCH_QUERY_PARAM = "batch"
+
+
+def _msgpack_default(obj):
+    """Encode types msgpack lacks the way the JSON frames do (ISO dates, else str)."""
+    isoformat = getattr(obj, "isoformat", None)
+    return isoformat() if isoformat is not None else str(obj)
+
+
+# Reused for every MessagePack frame (packb would build a Packer per call);
+# pack() returns a fresh bytes object that can be queued to many clients.
+# Only used from the event loop thread.
+_msgpack_packer = msgpack.Packer(use_bin_type=True, default=_msgpack_default)
+
+
+class _Connection:
+    """A registered client: its socket, codec and outgoing frame queue."""
+    
+    __slots__ = ("websocket", "msgpack", "batch", "queue", "writer")
+    
+    def __init__(self, websocket: WebSocket, use_msgpack: bool, batch: bool):
+        self.websocket = websocket
+        self.msgpack = use_msgpack
+        self.batch = batch
+        self.queue: "asyncio.Queue[Union[str, bytes]]" = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.writer: Optional[asyncio.Task] = None
+    
+    def enqueue(self, frame: Union[str, bytes]):
+        """Queue a frame for the writer, dropping the oldest if the client is behind."""
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait(frame)
 
 
 class WebSocketManager:
@@ -11,26 +62,43 @@ class WebSocketManager:
     - Connection management per organization
     - Broadcasting messages to all clients in an org
     - Connection tracking
+    - Non-blocking event publishing via a bounded queue, coalescing bursts
+    - Optional MessagePack frames for clients offering the "msgpack" subprotocol
+    - Per-client bounded send queues, so a slow client only loses its own
+      oldest frames instead of holding up others or growing memory
     """
     
     def __init__(self):
-        # Active connections: org_id -> set of websockets
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # Active connections: org_id -> websocket -> connection
+        self.active_connections: Dict[str, Dict[WebSocket, _Connection]] = {}
+        
+        # Pending broadcasts: (event_type, payload, org_id)
+        self._queue: "asyncio.Queue[Tuple[str, dict, str]]" = asyncio.Queue(maxsize=BROADCAST_QUEUE_SIZE)
+        self._worker: Optional[asyncio.Task] = None
     
     async def connect(self, websocket: WebSocket, org_id: str):
         """
         Accept and register a WebSocket connection.
         
+        Clients that offer the "msgpack" subprotocol get binary MessagePack
+        frames; everyone else keeps JSON text frames. Clients connecting with
+        ?batch=1 may get bursts as a single "batch" frame.
+        
         Args:
             websocket: WebSocket instance
             org_id: Organization ID
         """
-        await websocket.accept()
+        use_msgpack = MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", ())
+        await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL if use_msgpack else None)
+        
+        batch = websocket.query_params.get(BATCH_QUERY_PARAM) == "1"
+        conn = _Connection(websocket, use_msgpack, batch)
+        conn.writer = asyncio.create_task(self._write_frames(conn, org_id))
         
         if org_id not in self.active_connections:
-            self.active_connections[org_id] = set()
+            self.active_connections[org_id] = {}
         
-        self.active_connections[org_id].add(websocket)
+        self.active_connections[org_id][websocket] = conn
     
     def disconnect(self, websocket: WebSocket, org_id: str):
         """
@@ -41,12 +109,30 @@ class WebSocketManager:
             org_id: Organization ID
         """
         if org_id in self.active_connections:
-            self.active_connections[org_id].discard(websocket)
+            conn = self.active_connections[org_id].pop(websocket, None)
+            
+            # Stop its writer (unless the writer itself is disconnecting it)
+            if conn is not None and conn.writer is not asyncio.current_task():
+                conn.writer.cancel()
             
-            # Clean up empty org sets
+            # Clean up empty org maps
             if not self.active_connections[org_id]:
                 del self.active_connections[org_id]
     
+    async def _write_frames(self, conn: _Connection, org_id: str):
+        """Send a client's queued frames in order; drop the client on send failure."""
+        websocket = conn.websocket
+        while True:
+            frame = await conn.queue.get()
+            try:
+                if isinstance(frame, bytes):
+                    await websocket.send_bytes(frame)
+                else:
+                    await websocket.send_text(frame)
+            except Exception:
+                self.disconnect(websocket, org_id)
+                return
+    
     async def broadcast_to_org(self, org_id: str, message: dict):
         """
         Broadcast message to all connections in an organization.
@@ -55,21 +141,26 @@ class WebSocketManager:
             org_id: Organization ID
             message: Message dict to broadcast
         """
-        if org_id not in self.active_connections:
+        self._send_message(list(self.active_connections.get(org_id, {}).values()), message)
+    
+    def _send_message(self, connections: List[_Connection], message: dict):
+        """Encode a message once per codec actually in use and queue it to connections."""
+        if not connections:
             return
         
-        # Remove disconnected clients
-        disconnected = set()
+        # Unknown types are encoded via str
+        text_frame: Optional[str] = None
+        binary_frame: Optional[bytes] = None
+        codecs = {conn.msgpack for conn in connections}
+        if False in codecs:
+            text_frame = orjson.dumps(message, default=str).decode()
+        if True in codecs:
+            binary_frame = _msgpack_packer.pack(message)
         
-        for websocket in self.active_connections[org_id]:
-            try:
-                await websocket.send_json(message)
-            except Exception:
-                disconnected.add(websocket)
-        
-        # Clean up disconnected clients
-        for websocket in disconnected:
-            self.active_connections[org_id].discard(websocket)
+        for conn in connections:
+            frame = binary_frame if conn.msgpack else text_frame
+            if frame is not None:
+                conn.enqueue(frame)
     
     async def broadcast_event(self, event_type: str, payload: dict, org_id: str):
         """
@@ -85,6 +176,87 @@ class WebSocketManager:
             "payload": payload
         }
         await self.broadcast_to_org(org_id, message)
+    
+    def publish(self, event_type: str, payload: dict, org_id: Optional[str]):
+        """
+        Queue an event for broadcast without waiting for delivery.
+        
+        Request handlers use this so a slow WebSocket client never delays
+        the HTTP response. Events are dropped if the queue is full.
+        
+        Args:
+            event_type: Event type (e.g., 'submission:new')
+            payload: Event payload
+            org_id: Organization ID (events without one are ignored)
+        """
+        if not org_id:
+            return
+        
+        try:
+            self._queue.put_nowait((event_type, payload, org_id))
+        except asyncio.QueueFull:
+            logger.warning("WebSocket broadcast queue full, dropping %s", event_type)
+    
+    async def _broadcast_worker(self):
+        """
+        Deliver queued events until cancelled.
+        
+        Everything already queued when the worker wakes is drained at once and
+        grouped per org: a lone event goes out as-is; a burst goes out as one
+        {"type": "batch", "items": [...]} frame to clients that opted in with
+        ?batch=1, and as one frame per event to everyone else.
+        """
+        while True:
+            pending = [await self._queue.get()]
+            while True:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            
+            by_org: Dict[str, list] = {}
+            for event_type, payload, org_id in pending:
+                by_org.setdefault(org_id, []).append({"type": event_type, "payload": payload})
+            
+            try:
+                await asyncio.gather(*(
+                    self._broadcast_batch(org_id, messages)
+                    for org_id, messages in by_org.items()
+                ))
+            finally:
+                for _ in pending:
+                    self._queue.task_done()
+    
+    async def _broadcast_batch(self, org_id: str, messages: list):
+        """Send one org's drained events (batched only for opted-in clients)."""
+        try:
+            if len(messages) == 1:
+                await self.broadcast_to_org(org_id, messages[0])
+                return
+            
+            connections = list(self.active_connections.get(org_id, {}).values())
+            self._send_message([c for c in connections if c.batch], {"type": "batch", "items": messages})
+            
+            plain = [c for c in connections if not c.batch]
+            for message in messages:
+                self._send_message(plain, message)
+        except Exception as e:
+            logger.error("WebSocket broadcast error: %s", e)
+    
+    def start(self):
+        """Start the background broadcast worker (call from app startup)."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._broadcast_worker())
+    
+    async def stop(self):
+        """Stop the background broadcast worker (call from app shutdown)."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
 
 
 # Global WebSocket manager instance
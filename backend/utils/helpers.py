@@ -1,8 +1,11 @@
 """Utility helper functions"""
 
-from typing import List, Dict, Any
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator
 import re
 
+import orjson
 
 def sanitize_json_string(content: str) -> str:
     """
@@ -14,13 +17,58 @@ def sanitize_json_string(content: str) -> str:
     Returns:
         Cleaned JSON string
     """
-    # Remove markdown code blocks
-    if "```json" in content:
-        content = content.split("```json")[1].split("```")[0].strip()
-    elif "```" in content:
-        content = content.split("```")[1].split("```")[0].strip()
+    # Remove markdown code blocks: keep the body of the first fence (```json
+    # or bare ```); an unclosed fence runs to the end
+    fence = content.find("```")
+    if fence < 0:
+        return content
     
-    return content
+    start = fence + 3
+    if content.startswith("json", start):
+        start += 4
+    end = content.find("```", start)
+    if end < 0:
+        end = len(content)
+    
+    return content[start:end].strip()
+
+
+def parse_llm_json(content: str) -> Any:
+    """
+    Parse the JSON object in an LLM response.
+    
+    Well-behaved responses are bare JSON and are decoded as-is; otherwise
+    slices from the first "{" to the last "}" so markdown fences and any
+    prose around the object are ignored. Decodes with orjson.
+    
+    Args:
+        content: Raw model output
+        
+    Returns:
+        Decoded JSON value
+        
+    Raises:
+        json.JSONDecodeError: If the content is not valid JSON
+    """
+    content = content.strip()
+    if content.startswith("{") and content.endswith("}"):
+        return orjson.loads(content)
+    
+    start = content.find("{")
+    end = content.rfind("}") + 1
+    if start != -1 and end > start:
+        content = content[start:end]
+    
+    return orjson.loads(content)
+
+
+_COMMON_WORDS = frozenset({'the', 'and', 'for', 'with', 'from', 'this', 'that', 'have', 'been'})
+
+
+@lru_cache(maxsize=8)
+def _word_re(min_length: int) -> "re.Pattern[str]":
+    """Compiled pattern for runs of at least min_length letters."""
+    return re.compile(r"[^\W\d_]{%d,}" % min_length)
 
 
 def extract_keywords(text: str, min_length: int = 4) -> List[str]:
@@ -34,22 +82,13 @@ def extract_keywords(text: str, min_length: int = 4) -> List[str]:
     Returns:
         List of keywords
     """
-    # Convert to lowercase and split
-    words = text.lower().split()
+    # Lowercase words of at least min_length letters (punctuation/digits split words)
+    words = _word_re(min_length).findall(text.lower())
     
-    # Filter by length and remove common words
-    common_words = {'the', 'and', 'for', 'with', 'from', 'this', 'that', 'have', 'been'}
-    keywords = [w for w in words if len(w) >= min_length and w not in common_words]
+    # Remove common words and duplicates, preserving order
+    unique_keywords = dict.fromkeys(w for w in words if w not in _COMMON_WORDS)
     
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_keywords = []
-    for k in keywords:
-        if k not in seen:
-            seen.add(k)
-            unique_keywords.append(k)
-    
-    return unique_keywords[:20]  # Limit to 20 keywords
+    return list(islice(unique_keywords, 20))  # Limit to 20 keywords
 
 
 def format_duration(minutes: int) -> str:
@@ -105,15 +144,28 @@ def merge_dicts(base: Dict, update: Dict) -> Dict:
     """
     result = base.copy()
     
-    for key, value in update.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = merge_dicts(result[key], value)
-        else:
-            result[key] = value
+    # Iterative: only dicts present on both sides are copied, then merged into
+    stack = [(result, update)]
+    while stack:
+        target, source = stack.pop()
+        for key, value in source.items():
+            current = target.get(key)
+            if isinstance(current, dict) and isinstance(value, dict):
+                target[key] = current = current.copy()
+                stack.append((current, value))
+            else:
+                target[key] = value
     
     return result
 
 
+# Canonical 8-4-4-4-12 hex form (uuid.UUID would also accept braces, urn: and no dashes)
+_UUID_RE = re.compile(
+    r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$',
+    re.IGNORECASE
+)
+
+
 def validate_uuid(uuid_string: str) -> bool:
     """
     Validate UUID string format.
@@ -124,25 +176,25 @@ def validate_uuid(uuid_string: str) -> bool:
     Returns:
         True if valid UUID
     """
-    uuid_pattern = re.compile(
-        r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$',
-        re.IGNORECASE
-    )
-    return bool(uuid_pattern.match(uuid_string))
+    return _UUID_RE.match(uuid_string) is not None
 
 
-def chunk_list(lst: List[Any], chunk_size: int) -> List[List[Any]]:
+def chunk_list(lst: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
     """
-    Split list into chunks of specified size.
+    Split an iterable into chunks of specified size, lazily.
+    
+    Only one chunk is built at a time; wrap in list() to index the chunks.
     
     Args:
-        lst: List to chunk
+        lst: List (or any iterable) to chunk
         chunk_size: Size of each chunk
         
-    Returns:
-        List of chunks
+    Yields:
+        Chunks of up to chunk_size items
     """
-    return [lst[i:i + chunk_size] for i in range(0, len(lst), chunk_size)]
+    it = iter(lst)
+    while chunk := list(islice(it, chunk_size)):
+        yield chunk
 
 
 def safe_get(dictionary: Dict, *keys: str, default: Any = None) -> Any:
@@ -159,10 +211,13 @@ def safe_get(dictionary: Dict, *keys: str, default: Any = None) -> Any:
     """
     current = dictionary
     
-    for key in keys:
-        if isinstance(current, dict) and key in current:
+    # Only dict levels are walked; a missing key or any other level ends it
+    try:
+        for key in keys:
+            if not isinstance(current, dict):
+                return default
             current = current[key]
-        else:
-            return default
+    except (KeyError, TypeError):
+        return default
     
     return current
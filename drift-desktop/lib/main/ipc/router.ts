@@ -296,20 +296,15 @@ export function registerIpcHandlers(ctx: IpcContext): void {
           
           if (sources.length === 0) return
           
-          const screenshot = sources[0].thumbnail.toJPEG(50).toString('base64')
+          const screenshot = sources[0].thumbnail.toJPEG(50)
           
-          const response = await fetch(`${DRIFT_API_URL}/desktop/session/analyze-screen`, {
+          const response = await fetch(screenAnalysisUrl(), {
             method: 'POST',
             headers: {
-              'Content-Type': 'application/json',
+              'Content-Type': 'image/jpeg',
               'Authorization': `Bearer ${authToken}`
             },
-            body: JSON.stringify({
-              screenshot,
-              projectName: currentProjectName,
-              projectDescription: currentProjectDescription,
-              previousInsights: previousInsights.slice(-10)
-            })
+            body: screenshot
           })
           
           if (!response.ok) return
@@ -522,6 +517,15 @@ export function registerIpcHandlers(ctx: IpcContext): void {
   let currentProjectName: string | null = null
   let currentProjectDescription: string | null = null
 
+  // JPEG goes in the request body; project context rides in the query string
+  const screenAnalysisUrl = (): string => {
+    const params = new URLSearchParams()
+    if (currentProjectName) params.set('projectName', currentProjectName)
+    if (currentProjectDescription) params.set('projectDescription', currentProjectDescription)
+    previousInsights.slice(-10).forEach((insight) => params.append('previousInsights', insight))
+    return `${DRIFT_API_URL}/desktop/session/analyze-screen-raw?${params}`
+  }
+
   // Start continuous screen analysis
   ipcMain.handle('session:start-screen-analysis', async (_evt, projectInfo?: { name: string; description?: string }) => {
     if (screenAnalysisInterval) {
@@ -550,21 +554,16 @@ export function registerIpcHandlers(ctx: IpcContext): void {
         
         if (sources.length === 0) return
         
-        const screenshot = sources[0].thumbnail.toJPEG(50).toString('base64')
+        const screenshot = sources[0].thumbnail.toJPEG(50)
         
-        // Send to backend for analysis
-        const response = await fetch(`${DRIFT_API_URL}/desktop/session/analyze-screen`, {
+        // Send raw JPEG bytes to backend for analysis
+        const response = await fetch(screenAnalysisUrl(), {
           method: 'POST',
           headers: {
-            'Content-Type': 'application/json',
+            'Content-Type': 'image/jpeg',
             'Authorization': `Bearer ${authToken}`
           },
-          body: JSON.stringify({
-            screenshot,
-            projectName: currentProjectName,
-            projectDescription: currentProjectDescription,
-            previousInsights: previousInsights.slice(-10)
-          })
+          body: screenshot
         })
         
         if (!response.ok) return
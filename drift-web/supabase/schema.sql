@@ -157,6 +157,22 @@ EXCEPTION
   WHEN OTHERS THEN NULL;
 END $$;
 
+-- ============================================
+-- SUBMISSION ACTIVITIES TABLE
+-- ============================================
+CREATE TABLE IF NOT EXISTS submission_activities (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  submission_id UUID NOT NULL REFERENCES submissions(id) ON DELETE CASCADE,
+  app TEXT NOT NULL,
+  title TEXT NOT NULL,
+  summary TEXT NOT NULL,
+  duration INTEGER NOT NULL DEFAULT 0,
+  "timestamp" BIGINT NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS submission_activities_submission_idx ON submission_activities(submission_id);
+
 -- ============================================
 -- ROW LEVEL SECURITY (RLS)
 -- ============================================
@@ -167,6 +183,7 @@ ALTER TABLE briefs ENABLE ROW LEVEL SECURITY;
 ALTER TABLE tasks ENABLE ROW LEVEL SECURITY;
 ALTER TABLE submissions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE work_sessions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE submission_activities ENABLE ROW LEVEL SECURITY;
 
 -- Drop existing policies (safe re-run)
 DROP POLICY IF EXISTS "Allow all users access" ON users;
@@ -174,6 +191,7 @@ DROP POLICY IF EXISTS "Allow all briefs access" ON briefs;
 DROP POLICY IF EXISTS "Allow all tasks access" ON tasks;
 DROP POLICY IF EXISTS "Allow all submissions access" ON submissions;
 DROP POLICY IF EXISTS "Allow all work_sessions" ON work_sessions;
+DROP POLICY IF EXISTS "Allow all submission_activities" ON submission_activities;
 
 -- For MVP: allow all authenticated access (refine later with org_id checks)
 CREATE POLICY "Allow all users access" ON users
@@ -191,11 +209,18 @@ CREATE POLICY "Allow all submissions access" ON submissions
 CREATE POLICY "Allow all work_sessions" ON work_sessions
   FOR ALL USING (true) WITH CHECK (true);
 
+CREATE POLICY "Allow all submission_activities" ON submission_activities
+  FOR ALL USING (true) WITH CHECK (true);
+
 -- ============================================
 -- HELPER FUNCTIONS
 -- ============================================
 
--- Function to upsert user (called from frontend on login)
+-- Function to upsert user (called by the backend on /users/me and /auth/session)
+-- Existing org_id and role are never overwritten with NULL. is_new is true
+-- when the row was inserted. Kept in sync with backend/migrations/003_upsert_user.sql.
+DROP FUNCTION IF EXISTS upsert_user(TEXT, TEXT, TEXT, TEXT, TEXT);
+
 CREATE OR REPLACE FUNCTION upsert_user(
   p_id TEXT,
   p_org_id TEXT,
@@ -203,23 +228,19 @@ CREATE OR REPLACE FUNCTION upsert_user(
   p_name TEXT,
   p_avatar_url TEXT
 )
-RETURNS users AS $$
-DECLARE
-  v_user users;
-BEGIN
-  INSERT INTO users (id, org_id, email, name, avatar_url, updated_at)
-  VALUES (p_id, p_org_id, p_email, p_name, p_avatar_url, NOW())
+RETURNS TABLE (role TEXT, org_id TEXT, is_new BOOLEAN)
+LANGUAGE sql
+AS $$
+  INSERT INTO users AS u (id, org_id, email, name, avatar_url)
+  VALUES (p_id, p_org_id, p_email, p_name, p_avatar_url)
   ON CONFLICT (id) DO UPDATE SET
-    org_id = EXCLUDED.org_id,
     email = EXCLUDED.email,
     name = EXCLUDED.name,
     avatar_url = EXCLUDED.avatar_url,
+    org_id = COALESCE(EXCLUDED.org_id, u.org_id),
     updated_at = NOW()
-  RETURNING * INTO v_user;
-  
-  RETURN v_user;
-END;
-$$ LANGUAGE plpgsql;
+  RETURNING u.role, u.org_id, (u.xmax = 0) AS is_new;
+$$;
 
 -- Function to update user role
 CREATE OR REPLACE FUNCTION update_user_role(p_user_id TEXT, p_role TEXT)